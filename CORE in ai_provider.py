@@ -0,0 +1,274 @@
+"""
+AI Provider Layer
+-----------------
+Async model calls behind the brain modes.
+
+- AIProvider: one interface (complete), per-provider concurrency
+  limit + timeout budget (queue wait + call)
+- One shared pooled httpx client for every HTTP provider
+- Identical in-flight requests coalesced: N concurrent asks of the
+  same question -> one upstream call, everyone gets the answer
+- StubProvider: deterministic local answers with configurable latency,
+  for offline benchmarks (AI_PROVIDER=stub)
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from core.config import (
+    AI_PROVIDER,
+    AI_MODEL,
+    AI_MAX_CONCURRENCY,
+    AI_TIMEOUT_SECONDS,
+    AI_MAX_TOKENS,
+    AI_HTTP_MAX_CONNECTIONS,
+    AI_HTTP_MAX_KEEPALIVE,
+    AI_STUB_LATENCY_MS,
+    AI_STUB_JITTER_MS,
+    OPENAI_API_KEY
+)
+from utils.executor import Timing
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------
+# SHARED HTTP CLIENT (CONNECTION POOL)
+# ----------------------------------------
+_http_client: Optional["httpx.AsyncClient"] = None
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # loaded with the first HTTP provider call, not at import
+        import httpx
+
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE
+            ),
+            # provider budget (asyncio.wait_for) is the real limit
+            timeout=httpx.Timeout(AI_TIMEOUT_SECONDS, connect=5.0)
+        )
+    return _http_client
+
+
+# ----------------------------------------
+# PROVIDER INTERFACE
+# ----------------------------------------
+class AIProvider(ABC):
+    """
+    Subclasses implement _complete(system, prompt) -> text
+    (abstract: a provider without it fails when it is created).
+    Callers use complete(), which adds the budget + coalescing.
+    """
+
+    name = "base"
+
+    def __init__(self, max_concurrency: int, timeout_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+
+        self._slots = None
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timed_out = 0
+        self.latency = Timing()
+
+    @abstractmethod
+    async def _complete(self, system: str, prompt: str) -> str:
+        ...
+
+    async def _call(self, system: str, prompt: str) -> str:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def limited():
+            async with self._slots:
+                self.calls += 1
+                return await self._complete(system, prompt)
+
+        started = time.perf_counter()
+        try:
+            # one budget for waiting on a slot + the upstream call
+            return await asyncio.wait_for(limited(), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="AI provider timed out"
+            )
+        except HTTPException:
+            raise
+        except Exception:
+            self.errors += 1
+            logger.exception("AI provider %s failed", self.name)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="AI provider error"
+            )
+        finally:
+            self.latency.add((time.perf_counter() - started) * 1000)
+
+    def _finished(self, key: Tuple[str, str], task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # marks the error as seen even if every caller went away
+            task.exception()
+
+    async def complete(self, system: str, prompt: str) -> str:
+        key = (system, prompt)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._call(system, prompt))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+
+        # shield: one caller disconnecting must not cancel the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.name,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "timed_out": self.timed_out,
+            "latency": self.latency.stats()
+        }
+
+
+# ----------------------------------------
+# OPENAI
+# ----------------------------------------
+class OpenAIProvider(AIProvider):
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_tokens: int,
+        max_concurrency: int,
+        timeout_seconds: float
+    ):
+        super().__init__(max_concurrency, timeout_seconds)
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=get_http_client(),
+                # retries would blow the timeout budget
+                max_retries=0
+            )
+        return self._client
+
+    async def _complete(self, system: str, prompt: str) -> str:
+        result = await self._get_client().chat.completions.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        return result.choices[0].message.content or ""
+
+
+# ----------------------------------------
+# STUB (OFFLINE / BENCHMARKS)
+# ----------------------------------------
+class StubProvider(AIProvider):
+    """
+    Same input -> same answer and same latency, every run
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency_ms: int,
+        jitter_ms: int,
+        max_concurrency: int,
+        timeout_seconds: float
+    ):
+        super().__init__(max_concurrency, timeout_seconds)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    async def _complete(self, system: str, prompt: str) -> str:
+        digest = hashlib.sha256(f"{system}\n{prompt}".encode()).digest()
+
+        jitter = 0
+        if self.jitter_ms > 0:
+            jitter = int.from_bytes(digest[:4], "big") % (self.jitter_ms + 1)
+        await asyncio.sleep((self.latency_ms + jitter) / 1000)
+
+        return (
+            f"[stub:{digest[:4].hex()}] Focus on what you control, "
+            f"take one concrete step today: {prompt[:80]}"
+        )
+
+
+# ----------------------------------------
+# ACTIVE PROVIDER
+# ----------------------------------------
+def build_provider(name: str = AI_PROVIDER) -> AIProvider:
+    if name == "stub":
+        return StubProvider(
+            latency_ms=AI_STUB_LATENCY_MS,
+            jitter_ms=AI_STUB_JITTER_MS,
+            max_concurrency=AI_MAX_CONCURRENCY,
+            timeout_seconds=AI_TIMEOUT_SECONDS
+        )
+    if name == "openai":
+        return OpenAIProvider(
+            api_key=OPENAI_API_KEY,
+            model=AI_MODEL,
+            max_tokens=AI_MAX_TOKENS,
+            max_concurrency=AI_MAX_CONCURRENCY,
+            timeout_seconds=AI_TIMEOUT_SECONDS
+        )
+    raise ValueError(f"Unknown AI provider: {name}")
+
+
+ai_provider = build_provider()
+
+
+async def close_ai_provider():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def ai_provider_stats() -> dict:
+    return ai_provider.stats()
@@ -5,8 +5,18 @@ Main logic engine for problem solving, decision making,
 and structured responses (non-generic, logical).
 """
 
+import asyncio
+import re
 from datetime import datetime
-from typing import Dict, List
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from core.config import RESPONSE_CACHE_ENABLED, AI_MODES
+from core.response_cache import response_cache
+from core.ai_provider import ai_provider
+from utils.metrics import brain_mode_total
+
+BRAIN_MODES = ("basic", "decision", "problem", "money", "study", "nobullshit")
 
 # ----------------------------------------
 # CORE BRAIN RESPONSE ENGINE
@@ -145,6 +155,21 @@ def no_bullshit_mode(problem: str) -> Dict:
     }
 
 
+def basic_brain(question: str, timestamp: Optional[str] = None) -> Dict:
+    """
+    Default response when no special mode is chosen
+    """
+    return {
+        "type": "basic",
+        "question": question,
+        "answer": (
+            "Explain your problem clearly. "
+            "Clarity itself solves 50% of problems."
+        ),
+        "timestamp": timestamp or datetime.utcnow().isoformat()
+    }
+
+
 # ----------------------------------------
 # MAIN ENTRY FUNCTION
 # ----------------------------------------
@@ -154,8 +179,27 @@ def run_brain_engine(
     mode: str = "basic"
 ) -> Dict:
     """
-    Main brain router based on mode
+    Main brain router based on mode.
+    Template builders take microseconds: never cached (a cache
+    lookup costs more than building the answer).
     """
+    # unknown modes answer as basic, count them that way too
+    if mode not in BRAIN_MODES:
+        mode = "basic"
+    brain_mode_total.inc(mode)
+
+    return _route_brain_mode(question, mode)
+
+
+def _cached_response(question: str, mode: str) -> Optional[Dict]:
+    cached = response_cache.get(mode, question)
+    if cached is None:
+        return None
+    response, cached_question = cached
+    return _rebase_response(response, cached_question, question)
+
+
+def _route_brain_mode(question: str, mode: str) -> Dict:
     if mode == "decision":
         return decision_brain(question)
 
@@ -172,12 +216,336 @@ def run_brain_engine(
         return no_bullshit_mode(question)
 
     # Default basic response
-    return {
-        "type": "basic",
-        "question": question,
-        "answer": (
-            "Explain your problem clearly. "
-            "Clarity itself solves 50% of problems."
-        ),
-        "timestamp": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    return basic_brain(question)
+
+
+def _rebase_response(
+    response: Dict,
+    cached_question: str,
+    question: str
+) -> Dict:
+    """
+    Cached answer for a paraphrase: template responses are
+    re-rendered so they echo the question actually asked.
+    """
+    if cached_question == question:
+        return response
+
+    packed = pack_response(cached_question, response)
+    if "template" not in packed:
+        return response
+
+    try:
+        return render_response(packed["template"], packed["params"], question)
+    except (KeyError, TypeError, ValueError):
+        return response
+
+
+# ----------------------------------------
+# ASYNC ENTRY FUNCTION (MODEL-BACKED MODES)
+# ----------------------------------------
+
+# system prompt per brain mode
+MODE_PROMPTS = {
+    "basic": "You are BlackBrain. Answer clearly, logically and briefly.",
+    "decision": (
+        "You are BlackBrain decision mode. Weigh pros, cons and risk, "
+        "then give one clear suggestion."
+    ),
+    "problem": (
+        "You are BlackBrain problem breaker. Find root causes, what the "
+        "user controls, and a 7 day action plan."
+    ),
+    "money": (
+        "You are BlackBrain money brain (India). Suggest a safe split of "
+        "the amount between savings, learning and experiments."
+    ),
+    "study": (
+        "You are BlackBrain study brain. Diagnose the study problem and "
+        "give a 7 day study plan."
+    ),
+    "nobullshit": (
+        "You are BlackBrain no-bullshit mode. Be direct and honest, "
+        "no sugar coating, give concrete actions."
+    ),
+}
+
+
+async def run_brain_engine_async(
+    question: str,
+    mode: str = "basic",
+    use_cache: bool = True
+) -> Dict:
+    """
+    Modes listed in AI_MODES add the provider's answer ("ai_answer")
+    to the structured template response, behind the response cache;
+    other modes are the plain template engine.
+    """
+    if mode not in BRAIN_MODES or mode not in AI_MODES:
+        return run_brain_engine(question=question, mode=mode)
+
+    brain_mode_total.inc(mode)
+
+    use_cache = use_cache and RESPONSE_CACHE_ENABLED
+    if use_cache:
+        cached = _cached_response(question, mode)
+        if cached is not None:
+            return cached
+
+    response = _route_brain_mode(question, mode)
+    response["ai_answer"] = await ai_provider.complete(
+        MODE_PROMPTS[mode],
+        question.strip()
+    )
+
+    if use_cache:
+        response_cache.set(mode, question, response)
+    return response
+
+
+# ----------------------------------------
+# STREAMING ENTRY FUNCTION
+# ----------------------------------------
+
+async def stream_brain_engine(
+    question: str,
+    mode: str = "basic",
+    use_cache: bool = True
+) -> AsyncIterator[Tuple[str, object]]:
+    """
+    Yields (section, value) pairs in response order,
+    e.g. ("analysis", {...}), ("7_day_action_plan", [...]).
+    Template sections come straight away; modes in AI_MODES then
+    wait for the provider and yield "ai_answer" last. For those
+    modes a cached response is replayed whole, a fresh one is
+    cached once complete.
+    """
+    if mode not in BRAIN_MODES:
+        mode = "basic"
+    brain_mode_total.inc(mode)
+
+    use_cache = use_cache and RESPONSE_CACHE_ENABLED and mode in AI_MODES
+    if use_cache:
+        cached = _cached_response(question, mode)
+        if cached is not None:
+            for section, value in cached.items():
+                yield section, value
+            return
+
+    response = _route_brain_mode(question, mode)
+    for section, value in response.items():
+        yield section, value
+        await asyncio.sleep(0)
+
+    if mode in AI_MODES:
+        response["ai_answer"] = await ai_provider.complete(
+            MODE_PROMPTS[mode],
+            question.strip()
+        )
+        yield "ai_answer", response["ai_answer"]
+
+    if use_cache:
+        response_cache.set(mode, question, response)
+
+
+# ----------------------------------------
+# TEMPLATE STORAGE (HISTORY)
+# ----------------------------------------
+# Responses are static text around a few variable values, so history
+# stores "<type>@<version>" + only the variables that differ from the
+# question. Changing a builder's static content means adding a new
+# version here and keeping the old builder, so old rows render the same.
+
+# template id -> (builder, variable keys in builder argument order)
+RESPONSE_TEMPLATES = {
+    "decision@1": (decision_brain, ("problem",)),
+    "problem_breaker@1": (problem_breaker, ("problem",)),
+    "money_brain@1": (money_brain, ("amount",)),
+    "study_brain@1": (study_brain, ("subject",)),
+    "no_bullshit@1": (no_bullshit_mode, ("problem",)),
+    "basic@1": (basic_brain, ("question", "timestamp")),
+}
+
+# response "type" -> current template id
+CURRENT_TEMPLATES = {
+    template_id.split("@")[0]: template_id
+    for template_id in RESPONSE_TEMPLATES
+}
+
+
+def _default_param(key: str, question: str):
+    # values that can be rebuilt from the stored question
+    if key == "amount":
+        return int(question)
+    if key == "timestamp":
+        return None
+    return question
+
+
+def render_response(template_id: str, params: dict, question: str) -> Dict:
+    builder, keys = RESPONSE_TEMPLATES[template_id]
+    args = [
+        params[key] if key in params else _default_param(key, question)
+        for key in keys
+    ]
+    return builder(*args)
+
+
+# keys that are not answer text
+_UNSEARCHED_KEYS = {"type", "timestamp"}
+# stands in for the question when rendering a template's static text
+_PLACEHOLDER = "\x00"
+_SEARCH_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _strings(value, skip=()) -> List[str]:
+    parts = []
+
+    def walk(item):
+        if isinstance(item, dict):
+            for key, child in item.items():
+                if key not in _UNSEARCHED_KEYS:
+                    walk(child)
+        elif isinstance(item, (list, tuple)):
+            for child in item:
+                walk(child)
+        elif isinstance(item, str) and item and item not in skip:
+            parts.append(item)
+
+    walk(value)
+    return list(dict.fromkeys(parts))
+
+
+@lru_cache(maxsize=None)
+def template_strings(template_id: str) -> frozenset:
+    """
+    Static text of a template (same for every document using it)
+    """
+    builder, keys = RESPONSE_TEMPLATES[template_id]
+    args = [0 if key == "amount" else _PLACEHOLDER for key in keys]
+    return frozenset(_strings(builder(*args), skip=(_PLACEHOLDER,)))
+
+
+@lru_cache(maxsize=None)
+def _template_words(template_id: str) -> frozenset:
+    return frozenset(
+        word
+        for text in template_strings(template_id)
+        for word in _SEARCH_WORD.findall(text.lower())
+    )
+
+
+def template_token(template_id: str) -> str:
+    """
+    One indexed word standing for a template's static text
+    ("decision@1" -> "tpldecision1")
+    """
+    return "tpl" + re.sub(r"[\W_]", "", template_id)
+
+
+def response_search_text(question: str, response: Dict) -> str:
+    """
+    Text for the history search index: the template token plus the
+    strings the template doesn't produce itself (variable params,
+    model answer). The question is indexed separately; template
+    wording is matched through the token (see expand_search).
+    """
+    template_id = CURRENT_TEMPLATES.get(response.get("type"))
+    static = template_strings(template_id) if template_id else frozenset()
+
+    parts = [template_token(template_id)] if template_id else []
+    parts += _strings(response, skip=static | {question})
+    return "\n".join(parts)
+
+
+def expand_search(search: str) -> Tuple[str, List[str]]:
+    """
+    Rewrites a $text search for template wording, which isn't stored:
+    - word in a template -> that template's token is searched too
+    - "phrase" in a template -> the token instead of the phrase
+    - -word in a template -> template id returned for exclusion
+    Returns (search, excluded template ids).
+    """
+    phrases = re.findall(r'"([^"]+)"', search)
+    rest = re.sub(r'"[^"]*"', " ", search)
+
+    kept, matched, excluded = [], [], []
+    for phrase in phrases:
+        needle = phrase.lower()
+        ids = [
+            template_id for template_id in RESPONSE_TEMPLATES
+            if any(needle in text.lower() for text in template_strings(template_id))
+        ]
+        if ids:
+            matched += ids
+        else:
+            kept.append(f'"{phrase}"')
+
+    for raw in rest.split():
+        kept.append(raw)
+        words = set(_SEARCH_WORD.findall(raw.lower()))
+        ids = [
+            template_id for template_id in RESPONSE_TEMPLATES
+            if words & _template_words(template_id)
+        ]
+        (excluded if raw.startswith("-") else matched).extend(ids)
+
+    tokens = [template_token(template_id) for template_id in dict.fromkeys(matched)]
+    return " ".join(kept + tokens), list(dict.fromkeys(excluded))
+
+
+def search_fields(question: str, response: Dict) -> Dict:
+    text = response_search_text(question, response)
+    return {"search_text": text} if text else {}
+
+
+def pack_response(question: str, response: Dict) -> Dict:
+    """
+    Returns fields for the history document:
+    {"template": id, "params": {...}} or {"response": {...}}
+    when the response can't be rebuilt exactly from a template,
+    plus "search_text" (no template wording) for search.
+    """
+    search = search_fields(question, response)
+
+    template_id = CURRENT_TEMPLATES.get(response.get("type"))
+    if template_id is None:
+        return {"response": response, **search}
+
+    _, keys = RESPONSE_TEMPLATES[template_id]
+    params = {}
+    for key in keys:
+        value = response.get(key)
+        try:
+            default = _default_param(key, question)
+        except (TypeError, ValueError):
+            default = None
+        if value != default:
+            params[key] = value
+
+    try:
+        rebuilt = render_response(template_id, params, question)
+    except (KeyError, TypeError, ValueError):
+        rebuilt = None
+
+    if rebuilt != response:
+        return {"response": response, **search}
+
+    return {"template": template_id, "params": params, **search}
+
+
+def unpack_response(doc: Dict) -> Optional[Dict]:
+    """
+    Response of a history document, either form
+    """
+    if doc.get("response") is not None:
+        return doc["response"]
+
+    template_id = doc.get("template")
+    if template_id in RESPONSE_TEMPLATES:
+        return render_response(
+            template_id,
+            doc.get("params") or {},
+            doc.get("question")
+        )
+    return None
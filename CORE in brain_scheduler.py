@@ -0,0 +1,66 @@
+"""
+Brain Scheduler
+---------------
+Plan-weighted scheduling of brain work ("priority_processing").
+
+- priority: plans with the priority_processing entitlement
+- paid:     other paid plans
+- free:     everyone else
+Under load paid tiers get most worker slots; free traffic spikes
+queue (and get shed) in their own tier.
+"""
+
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from core.config import (
+    SUBSCRIPTION_PLANS,
+    BRAIN_SCHEDULER_ENABLED,
+    BRAIN_SCHEDULER_WORKERS,
+    BRAIN_SCHEDULER_TIERS
+)
+from core.plan_guard import effective_plan, has_entitlement
+from utils.scheduler import WeightedFairScheduler
+
+brain_scheduler = WeightedFairScheduler(
+    name="brain",
+    workers=BRAIN_SCHEDULER_WORKERS,
+    tiers=BRAIN_SCHEDULER_TIERS
+)
+
+
+def plan_tier(user_plan: str, plan_expiry: Optional[datetime] = None) -> str:
+    plan = effective_plan(user_plan, plan_expiry)
+    if has_entitlement(plan, "priority_processing"):
+        return "priority"
+    if SUBSCRIPTION_PLANS.get(plan, {}).get("price"):
+        return "paid"
+    return "free"
+
+
+async def schedule_brain_work(
+    user_plan: str,
+    fn: Callable[..., Awaitable],
+    *args,
+    **kwargs
+):
+    """
+    Runs fn in the user's tier (or directly when the scheduler is off)
+    """
+    if not BRAIN_SCHEDULER_ENABLED:
+        return await fn(*args, **kwargs)
+    return await brain_scheduler.run(plan_tier(user_plan), fn, *args, **kwargs)
+
+
+def brain_slot(user_plan: str):
+    """
+    Slot for work that isn't a single call (streaming)
+    """
+    if not BRAIN_SCHEDULER_ENABLED:
+        return nullcontext()
+    return brain_scheduler.slot(plan_tier(user_plan))
+
+
+def brain_scheduler_stats() -> dict:
+    return brain_scheduler.stats()
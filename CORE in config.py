@@ -43,6 +43,16 @@ MONGO_DB_NAME = os.getenv(
     "MONGO_DB_NAME",
     "blackbrain"
 )
+MONGO_BACKEND = os.getenv("MONGO_BACKEND", "motor")  # motor / memory
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 5))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+    os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)
+)
+MONGO_WARMUP_CONNECTIONS = int(
+    os.getenv("MONGO_WARMUP_CONNECTIONS", MONGO_MIN_POOL_SIZE)
+)
 
 # ----------------------------------------
 # JWT AUTH
@@ -56,13 +66,67 @@ JWT_EXPIRE_MINUTES = int(
     os.getenv("JWT_EXPIRE_MINUTES", 60 * 24)
 )  # 24 hours
 
+# ----------------------------------------
+# PASSWORD HASHING (BCRYPT EXECUTOR)
+# ----------------------------------------
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", 2)
+)
+PASSWORD_HASH_MAX_PENDING = int(
+    os.getenv("PASSWORD_HASH_MAX_PENDING", 64)
+)
+PASSWORD_HASH_QUEUE_TIMEOUT_MS = int(
+    os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_MS", 2000)
+)
+
+# ----------------------------------------
+# IDENTITY CACHE
+# ----------------------------------------
+IDENTITY_CACHE_TTL_SECONDS = int(
+    os.getenv("IDENTITY_CACHE_TTL_SECONDS", 60)
+)
+IDENTITY_CACHE_MAX_ENTRIES = int(
+    os.getenv("IDENTITY_CACHE_MAX_ENTRIES", 10000)
+)
+
+# ----------------------------------------
+# INVALIDATION BUS (CHANGE STREAMS)
+# ----------------------------------------
+# cross-worker cache invalidation from users / settings change streams
+INVALIDATION_BUS_ENABLED = os.getenv("INVALIDATION_BUS_ENABLED", "true").lower() == "true"
+# cache TTL while change streams are unavailable (standalone mongod)
+INVALIDATION_FALLBACK_TTL_SECONDS = int(
+    os.getenv("INVALIDATION_FALLBACK_TTL_SECONDS", 10)
+)
+# reconnect delay after a stream error (resumes from the last token)
+INVALIDATION_RETRY_SECONDS = int(
+    os.getenv("INVALIDATION_RETRY_SECONDS", 2)
+)
+# how often to try again when change streams are not supported
+INVALIDATION_PROBE_SECONDS = int(
+    os.getenv("INVALIDATION_PROBE_SECONDS", 300)
+)
+
+# ----------------------------------------
+# RATE LIMITS (FREE USERS)
+# ----------------------------------------
+FREE_DAILY_QUESTION_LIMIT = int(
+    os.getenv("FREE_DAILY_QUESTION_LIMIT", 5)
+)
+QUOTA_BACKEND = os.getenv("QUOTA_BACKEND", "mongo")  # mongo / memory
+# free history is kept this long (TTL), paid plans keep everything
+FREE_HISTORY_RETENTION_DAYS = int(
+    os.getenv("FREE_HISTORY_RETENTION_DAYS", 30)
+)
+
 # ----------------------------------------
 # SUBSCRIPTION PLANS
 # ----------------------------------------
 SUBSCRIPTION_PLANS = {
     "free": {
         "price": 0,
-        "daily_limit": 5,
+        "daily_limit": FREE_DAILY_QUESTION_LIMIT,
+        "history_retention_days": FREE_HISTORY_RETENTION_DAYS,
         "features": ["basic"]
     },
     "pro_monthly": {
@@ -103,11 +167,93 @@ SUBSCRIPTION_PLANS = {
     }
 }
 
+# entitlement table reload from settings collection
+ENTITLEMENTS_REFRESH_SECONDS = int(
+    os.getenv("ENTITLEMENTS_REFRESH_SECONDS", 60)
+)
+
+# background downgrade of expired paid plans
+PLAN_EXPIRY_SWEEP_SECONDS = int(
+    os.getenv("PLAN_EXPIRY_SWEEP_SECONDS", 300)
+)
+PLAN_EXPIRY_BATCH_SIZE = int(
+    os.getenv("PLAN_EXPIRY_BATCH_SIZE", 500)
+)
+PLAN_EXPIRY_MAX_BATCHES = int(
+    os.getenv("PLAN_EXPIRY_MAX_BATCHES", 20)
+)
+
 # ----------------------------------------
-# AI SETTINGS (FUTURE)
+# AI SETTINGS
 # ----------------------------------------
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-AI_PROVIDER = os.getenv("AI_PROVIDER", "openai")
+AI_PROVIDER = os.getenv("AI_PROVIDER", "openai")  # openai / stub
+AI_MODEL = os.getenv("AI_MODEL", "gpt-4o-mini")
+# brain modes answered by the provider (empty -> templates only)
+AI_MODES = [
+    m.strip() for m in os.getenv("AI_MODES", "").split(",")
+    if m.strip()
+]
+# per-provider budget: concurrent upstream calls + total time per call
+AI_MAX_CONCURRENCY = int(
+    os.getenv("AI_MAX_CONCURRENCY", 16)
+)
+AI_TIMEOUT_SECONDS = float(
+    os.getenv("AI_TIMEOUT_SECONDS", 20)
+)
+AI_MAX_TOKENS = int(
+    os.getenv("AI_MAX_TOKENS", 600)
+)
+# shared HTTP connection pool
+AI_HTTP_MAX_CONNECTIONS = int(
+    os.getenv("AI_HTTP_MAX_CONNECTIONS", 32)
+)
+AI_HTTP_MAX_KEEPALIVE = int(
+    os.getenv("AI_HTTP_MAX_KEEPALIVE", 16)
+)
+# stub provider (offline benchmarks)
+AI_STUB_LATENCY_MS = int(
+    os.getenv("AI_STUB_LATENCY_MS", 300)
+)
+AI_STUB_JITTER_MS = int(
+    os.getenv("AI_STUB_JITTER_MS", 100)
+)
+
+# ----------------------------------------
+# RESPONSE CACHE (IN FRONT OF BRAIN ENGINE)
+# ----------------------------------------
+# only wraps model-backed answers (AI_MODES); template modes are
+# cheaper to build than to look up
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(
+    os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 5000)
+)
+RESPONSE_CACHE_MAX_BYTES = int(
+    os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+)
+RESPONSE_CACHE_TTL_SECONDS = int(
+    os.getenv("RESPONSE_CACHE_TTL_SECONDS", 6 * 60 * 60)
+)
+# paraphrase lookup: SimHash bits allowed to differ (0 = exact only)
+RESPONSE_CACHE_SIMHASH_DISTANCE = int(
+    os.getenv("RESPONSE_CACHE_SIMHASH_DISTANCE", 3)
+)
+# content words (filler removed) needed before a near match counts
+RESPONSE_CACHE_MIN_NEAR_TOKENS = int(
+    os.getenv("RESPONSE_CACHE_MIN_NEAR_TOKENS", 2)
+)
+# time-sensitive modes, never cached (basic carries a timestamp)
+RESPONSE_CACHE_EXCLUDED_MODES = [
+    m.strip() for m in
+    os.getenv("RESPONSE_CACHE_EXCLUDED_MODES", "basic").split(",")
+    if m.strip()
+]
+# modes where a near match is not the same question (amounts)
+RESPONSE_CACHE_EXACT_ONLY_MODES = [
+    m.strip() for m in
+    os.getenv("RESPONSE_CACHE_EXACT_ONLY_MODES", "money").split(",")
+    if m.strip()
+]
 
 # ----------------------------------------
 # PAYMENT (RAZORPAY)
@@ -115,13 +261,193 @@ AI_PROVIDER = os.getenv("AI_PROVIDER", "openai")
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "")
 RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+# razorpay / fake (local gateway for tests and offline dev)
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "razorpay")
+# sync SDK calls run on their own small pool, never on the event loop
+RAZORPAY_WORKERS = int(
+    os.getenv("RAZORPAY_WORKERS", 4)
+)
+RAZORPAY_MAX_PENDING = int(
+    os.getenv("RAZORPAY_MAX_PENDING", 64)
+)
+RAZORPAY_QUEUE_TIMEOUT_MS = int(
+    os.getenv("RAZORPAY_QUEUE_TIMEOUT_MS", 2000)
+)
+# per gateway call (also passed to the HTTP request itself)
+RAZORPAY_TIMEOUT_SECONDS = float(
+    os.getenv("RAZORPAY_TIMEOUT_SECONDS", 10)
+)
+FAKE_GATEWAY_LATENCY_MS = int(
+    os.getenv("FAKE_GATEWAY_LATENCY_MS", 0)
+)
+# unpaid checkout orders are reused for this long per (user, plan)
+PENDING_ORDER_TTL_SECONDS = int(
+    os.getenv("PENDING_ORDER_TTL_SECONDS", 900)
+)
+# reuse only while this much validity is left (time to pay)
+PENDING_ORDER_MIN_REMAINING_SECONDS = int(
+    os.getenv("PENDING_ORDER_MIN_REMAINING_SECONDS", 120)
+)
+# processed webhook events are kept this long (duplicate detection)
+PAYMENT_EVENT_KEEP_DAYS = int(
+    os.getenv("PAYMENT_EVENT_KEEP_DAYS", 30)
+)
+# failed events are retried with exponential backoff, then parked as "dead"
+PAYMENT_EVENT_MAX_ATTEMPTS = int(
+    os.getenv("PAYMENT_EVENT_MAX_ATTEMPTS", 8)
+)
+PAYMENT_EVENT_RETRY_BASE_SECONDS = float(
+    os.getenv("PAYMENT_EVENT_RETRY_BASE_SECONDS", 2)
+)
+PAYMENT_EVENT_RETRY_MAX_SECONDS = float(
+    os.getenv("PAYMENT_EVENT_RETRY_MAX_SECONDS", 300)
+)
+# a "processing" event with no update this long can be taken over
+PAYMENT_EVENT_STALE_SECONDS = int(
+    os.getenv("PAYMENT_EVENT_STALE_SECONDS", 60)
+)
 
 # ----------------------------------------
-# RATE LIMITS (FREE USERS)
+# BRAIN SCHEDULER (PRIORITY PROCESSING)
 # ----------------------------------------
-FREE_DAILY_QUESTION_LIMIT = int(
-    os.getenv("FREE_DAILY_QUESTION_LIMIT", 5)
+BRAIN_SCHEDULER_ENABLED = os.getenv("BRAIN_SCHEDULER_ENABLED", "true").lower() == "true"
+# brain jobs running at once
+BRAIN_SCHEDULER_WORKERS = int(
+    os.getenv("BRAIN_SCHEDULER_WORKERS", 32)
+)
+# tier -> share of slots under load, queue limit, max queue wait
+BRAIN_SCHEDULER_TIERS = {
+    "priority": {
+        "weight": int(os.getenv("BRAIN_PRIORITY_WEIGHT", 8)),
+        "max_queue": int(os.getenv("BRAIN_PRIORITY_MAX_QUEUE", 500)),
+        "deadline_ms": int(os.getenv("BRAIN_PRIORITY_DEADLINE_MS", 10000))
+    },
+    "paid": {
+        "weight": int(os.getenv("BRAIN_PAID_WEIGHT", 4)),
+        "max_queue": int(os.getenv("BRAIN_PAID_MAX_QUEUE", 300)),
+        "deadline_ms": int(os.getenv("BRAIN_PAID_DEADLINE_MS", 8000))
+    },
+    "free": {
+        "weight": int(os.getenv("BRAIN_FREE_WEIGHT", 1)),
+        "max_queue": int(os.getenv("BRAIN_FREE_MAX_QUEUE", 100)),
+        "deadline_ms": int(os.getenv("BRAIN_FREE_DEADLINE_MS", 3000))
+    }
+}
+
+# ----------------------------------------
+# BRAIN BATCH
+# ----------------------------------------
+BRAIN_BATCH_MAX_ITEMS = int(
+    os.getenv("BRAIN_BATCH_MAX_ITEMS", 50)
+)
+
+# ----------------------------------------
+# HISTORY WRITE-BEHIND
+# ----------------------------------------
+HISTORY_WRITE_BEHIND = os.getenv(
+    "HISTORY_WRITE_BEHIND", "false"
+).lower() == "true"
+HISTORY_WRITE_BEHIND_MAX_QUEUE = int(
+    os.getenv("HISTORY_WRITE_BEHIND_MAX_QUEUE", 5000)
+)
+HISTORY_WRITE_BEHIND_BATCH_SIZE = int(
+    os.getenv("HISTORY_WRITE_BEHIND_BATCH_SIZE", 200)
+)
+HISTORY_WRITE_BEHIND_FLUSH_MS = int(
+    os.getenv("HISTORY_WRITE_BEHIND_FLUSH_MS", 50)
+)
+HISTORY_WRITE_BEHIND_PUT_TIMEOUT_MS = int(
+    os.getenv("HISTORY_WRITE_BEHIND_PUT_TIMEOUT_MS", 200)
+)
+# failed flush: retries with doubling pause, then one insert per doc
+HISTORY_WRITE_BEHIND_RETRIES = int(
+    os.getenv("HISTORY_WRITE_BEHIND_RETRIES", 3)
+)
+HISTORY_WRITE_BEHIND_RETRY_MS = int(
+    os.getenv("HISTORY_WRITE_BEHIND_RETRY_MS", 100)
+)
+
+# ----------------------------------------
+# HISTORY CLEAR JOBS
+# ----------------------------------------
+HISTORY_DELETE_CHUNK_SIZE = int(
+    os.getenv("HISTORY_DELETE_CHUNK_SIZE", 500)
+)
+# pause between chunks (keeps oplog / replication lag flat)
+HISTORY_DELETE_PAUSE_MS = int(
+    os.getenv("HISTORY_DELETE_PAUSE_MS", 100)
+)
+# a running job with no progress this long can be taken over
+HISTORY_JOB_STALE_SECONDS = int(
+    os.getenv("HISTORY_JOB_STALE_SECONDS", 120)
+)
+# finished job documents are kept this long for polling
+HISTORY_JOB_KEEP_DAYS = int(
+    os.getenv("HISTORY_JOB_KEEP_DAYS", 7)
+)
+
+# ----------------------------------------
+# HISTORY EXPORT
+# ----------------------------------------
+# documents per Mongo getMore while streaming an export
+HISTORY_EXPORT_BATCH_SIZE = int(
+    os.getenv("HISTORY_EXPORT_BATCH_SIZE", 500)
+)
+# bytes buffered before a chunk is sent to the client
+HISTORY_EXPORT_CHUNK_BYTES = int(
+    os.getenv("HISTORY_EXPORT_CHUNK_BYTES", 64 * 1024)
+)
+
+# ----------------------------------------
+# HISTORY ARCHIVE (COLD TIER)
+# ----------------------------------------
+# history older than this moves into monthly compressed buckets
+HISTORY_ARCHIVE_AFTER_DAYS = int(
+    os.getenv("HISTORY_ARCHIVE_AFTER_DAYS", 90)
+)
+# entries per bucket document (keeps blobs far below 16MB)
+HISTORY_ARCHIVE_BUCKET_MAX_ENTRIES = int(
+    os.getenv("HISTORY_ARCHIVE_BUCKET_MAX_ENTRIES", 2000)
+)
+HISTORY_ARCHIVE_COMPRESS_LEVEL = int(
+    os.getenv("HISTORY_ARCHIVE_COMPRESS_LEVEL", 6)
+)
+# buckets written per archive pass
+HISTORY_ARCHIVE_MAX_BUCKETS = int(
+    os.getenv("HISTORY_ARCHIVE_MAX_BUCKETS", 1000)
+)
+
+# ----------------------------------------
+# METRICS
+# ----------------------------------------
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+EVENT_LOOP_LAG_INTERVAL_MS = int(
+    os.getenv("EVENT_LOOP_LAG_INTERVAL_MS", 500)
+)
+
+# ----------------------------------------
+# STARTUP BUDGET
+# ----------------------------------------
+# process spawn -> first 200 from /health (scripts.startup_profile --check)
+STARTUP_BUDGET_MS = int(
+    os.getenv("STARTUP_BUDGET_MS", 3000)
+)
+
+# ----------------------------------------
+# COMPRESSION / STATIC FILES
+# ----------------------------------------
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# bodies smaller than this go out as-is
+COMPRESSION_MIN_SIZE = int(
+    os.getenv("COMPRESSION_MIN_SIZE", 1024)
+)
+COMPRESSION_GZIP_LEVEL = int(
+    os.getenv("COMPRESSION_GZIP_LEVEL", 6)
+)
+COMPRESSION_BROTLI_QUALITY = int(
+    os.getenv("COMPRESSION_BROTLI_QUALITY", 4)
 )
+STATIC_DIR = os.getenv("STATIC_DIR", "static")
 
 # ----------------------------------------
 # LOGGING
@@ -0,0 +1,172 @@
+"""
+Plan Expiry Sweeper
+-------------------
+- Background job: downgrades expired paid users to free
+- Batched update_many passes over the (plan, plan_expiry) index
+- Lease document in settings collection -> only one worker sweeps
+- Per-pass stats (users downgraded, duration) + metrics
+- Identity cache invalidated for every downgraded user
+- Downgraded users' history moves into the free plan's retention
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from core.config import (
+    SUBSCRIPTION_PLANS,
+    PLAN_EXPIRY_SWEEP_SECONDS,
+    PLAN_EXPIRY_BATCH_SIZE,
+    PLAN_EXPIRY_MAX_BATCHES
+)
+from core.identity_cache import invalidate_user
+from core.history_lifecycle import apply_plan_retention
+from db.mongo import users, settings
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LEASE_ID = "lease:plan_expiry_sweep"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+PAID_PLANS = [code for code, plan in SUBSCRIPTION_PLANS.items() if plan.get("price")]
+
+downgraded_total = registry.counter(
+    "blackbrain_plan_expiry_downgraded_total",
+    "Users downgraded to free by the expiry sweeper"
+)
+sweep_duration = registry.histogram(
+    "blackbrain_plan_expiry_sweep_seconds",
+    "Duration of one expiry sweep pass"
+)
+
+last_pass: dict = {}
+
+
+# ----------------------------------------
+# LEASE
+# ----------------------------------------
+async def acquire_lease(lease_seconds: float) -> bool:
+    """
+    Takes the lease if it is free, expired, or already ours.
+    A live lease held by someone else makes the upsert collide
+    on _id -> DuplicateKeyError -> not acquired.
+    """
+    now = datetime.utcnow()
+    try:
+        await settings.find_one_and_update(
+            {
+                "_id": LEASE_ID,
+                "$or": [
+                    {"expires_at": {"$lte": now}},
+                    {"owner": WORKER_ID}
+                ]
+            },
+            {"$set": {
+                "owner": WORKER_ID,
+                "expires_at": now + timedelta(seconds=lease_seconds)
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def release_lease(stats: dict):
+    await settings.update_one(
+        {"_id": LEASE_ID, "owner": WORKER_ID},
+        {"$set": {"expires_at": datetime.utcnow(), "last_pass": stats}}
+    )
+
+
+# ----------------------------------------
+# SWEEP PASS
+# ----------------------------------------
+async def sweep_expired_plans(
+    batch_size: int = PLAN_EXPIRY_BATCH_SIZE,
+    max_batches: int = PLAN_EXPIRY_MAX_BATCHES
+) -> Optional[dict]:
+    """
+    One pass. Returns stats, or None when another worker holds the lease.
+    """
+    global last_pass
+
+    if not await acquire_lease(lease_seconds=max(60, PLAN_EXPIRY_SWEEP_SECONDS)):
+        return None
+
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    downgraded = 0
+    batches = 0
+
+    try:
+        while batches < max_batches:
+            cursor = users.find(
+                {"plan": {"$in": PAID_PLANS}, "plan_expiry": {"$lte": now}},
+                {"_id": 1}
+            ).limit(batch_size)
+            ids = [doc["_id"] async for doc in cursor]
+            if not ids:
+                break
+
+            result = await users.update_many(
+                # re-check expiry: a renewal may have landed meanwhile
+                {"_id": {"$in": ids}, "plan_expiry": {"$lte": now}},
+                {"$set": {
+                    "plan": "free",
+                    "payment_status": "expired",
+                    "updated_at": datetime.utcnow()
+                }}
+            )
+            for user_id in ids:
+                invalidate_user(str(user_id))
+
+            if result.modified_count:
+                downgraded_ids = [
+                    str(doc["_id"])
+                    async for doc in users.find(
+                        {"_id": {"$in": ids}, "plan": "free"},
+                        {"_id": 1}
+                    )
+                ]
+                await apply_plan_retention(downgraded_ids, "free")
+
+            downgraded += result.modified_count
+            batches += 1
+
+            if len(ids) < batch_size:
+                break
+    finally:
+        elapsed = time.perf_counter() - started
+        stats = {
+            "worker": WORKER_ID,
+            "started_at": now,
+            "downgraded": downgraded,
+            "batches": batches,
+            "duration_ms": round(elapsed * 1000, 3)
+        }
+        last_pass = stats
+        downgraded_total.inc(amount=downgraded)
+        sweep_duration.observe(value=elapsed)
+        await release_lease(stats)
+
+    if downgraded:
+        logger.info("Plan expiry sweep downgraded %s users", downgraded)
+    return stats
+
+
+async def run_expiry_sweeper(interval: float = PLAN_EXPIRY_SWEEP_SECONDS):
+    while True:
+        try:
+            await sweep_expired_plans()
+        except Exception:
+            logger.exception("Plan expiry sweep failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,315 @@
+"""
+History Archive
+---------------
+Cold tier for old history.
+
+- Hot tier: `history`, one document per question (recent activity)
+- Cold tier: `history_archive`, one bucket per user per month,
+  entries stored as a zlib-compressed BSON blob
+- Archive pass moves untimed history older than
+  HISTORY_ARCHIVE_AFTER_DAYS into buckets (free-plan docs expire by
+  TTL first and are never archived)
+- Readers see one list: buckets are listed without their blob and
+  only decompressed when a page actually reaches into them
+- Search covers the hot tier only (buckets carry no text index);
+  archived_until() tells callers where that coverage stops
+- Users with a history clear in progress are skipped, so a bucket
+  can't bring cleared history back
+"""
+
+import zlib
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional
+
+import bson
+
+from core.config import (
+    HISTORY_ARCHIVE_AFTER_DAYS,
+    HISTORY_ARCHIVE_BUCKET_MAX_ENTRIES,
+    HISTORY_ARCHIVE_COMPRESS_LEVEL,
+    HISTORY_ARCHIVE_MAX_BUCKETS
+)
+from core.history_lifecycle import ACTIVE, CLEAR_JOB
+from db.mongo import history, history_archive, jobs
+from utils.metrics import registry
+from utils.pagination import NEWEST_FIRST, after_cursor_query, decode_cursor
+
+CODEC = "zlib+bson"
+# hot-only fields that are not kept in archived entries
+DROPPED_FIELDS = ("user_id", "search_text", "response_text", "expires_at")
+BUCKET_META = {"blob": 0}
+
+history_archived_total = registry.counter(
+    "blackbrain_history_archived_total",
+    "History documents moved into the cold tier"
+)
+
+
+# ----------------------------------------
+# BUCKET ENCODING
+# ----------------------------------------
+def _key(doc: dict) -> tuple:
+    return (doc["created_at"], doc["_id"])
+
+
+def pack_entries(docs: List[dict]) -> bytes:
+    entries = [
+        {k: v for k, v in doc.items() if k not in DROPPED_FIELDS}
+        for doc in docs
+    ]
+    raw = bson.encode({"entries": entries})
+    return zlib.compress(raw, HISTORY_ARCHIVE_COMPRESS_LEVEL)
+
+
+def unpack_entries(blob: bytes) -> List[dict]:
+    return bson.decode(zlib.decompress(blob))["entries"]
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return datetime(month.year + 1, 1, 1)
+    return datetime(month.year, month.month + 1, 1)
+
+
+# ----------------------------------------
+# ARCHIVE PASS
+# ----------------------------------------
+def archive_eligible_query(cutoff: datetime) -> dict:
+    return {"created_at": {"$lt": cutoff}, "expires_at": {"$exists": False}}
+
+
+async def archive_old_history(
+    older_than_days: int = HISTORY_ARCHIVE_AFTER_DAYS,
+    max_buckets: int = HISTORY_ARCHIVE_MAX_BUCKETS,
+    bucket_size: int = HISTORY_ARCHIVE_BUCKET_MAX_ENTRIES
+) -> dict:
+    """
+    Oldest (user, month) first. Bucket is written before the hot docs
+    are deleted, so a crash in between only leaves duplicates (readers
+    drop them) and the next pass carries on.
+    A clear job for the user, before or while the bucket is built,
+    skips that user for this pass (the clear owns their history).
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    eligible = archive_eligible_query(cutoff)
+    stats = {"buckets": 0, "archived": 0, "raw_bytes": 0, "stored_bytes": 0}
+    skipped = []
+
+    while stats["buckets"] < max_buckets:
+        query = {**eligible, "user_id": {"$nin": skipped}} if skipped else eligible
+        oldest = await history.find_one(
+            query,
+            {"user_id": 1, "created_at": 1},
+            sort=[("created_at", 1)]
+        )
+        if oldest is None:
+            break
+
+        user_id = oldest["user_id"]
+        read_at = datetime.utcnow()
+        if await _clearing(user_id, read_at):
+            skipped.append(user_id)
+            continue
+
+        month = _month_start(oldest["created_at"])
+        cursor = (
+            history
+            .find({
+                **eligible,
+                "user_id": user_id,
+                "created_at": {"$gte": month, "$lt": min(_next_month(month), cutoff)}
+            })
+            .sort("created_at", 1)
+            .limit(bucket_size)
+        )
+        docs = await cursor.to_list(length=bucket_size)
+        if not docs:
+            break
+
+        blob = pack_entries(docs)
+        result = await history_archive.insert_one({
+            "user_id": user_id,
+            "month": month,
+            "count": len(docs),
+            "oldest_at": docs[0]["created_at"],
+            "newest_at": docs[-1]["created_at"],
+            "codec": CODEC,
+            "blob": blob,
+            "created_at": datetime.utcnow()
+        })
+        if await _clearing(user_id, read_at):
+            # clear started meanwhile and may have missed this bucket
+            await history_archive.delete_one({"_id": result.inserted_id})
+            skipped.append(user_id)
+            continue
+        await history.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+
+        history_archived_total.inc(amount=len(docs))
+        stats["buckets"] += 1
+        stats["archived"] += len(docs)
+        stats["raw_bytes"] += len(bson.encode({"entries": docs}))
+        stats["stored_bytes"] += len(blob)
+
+    stats["skipped_users"] = len(skipped)
+    return stats
+
+
+async def _clearing(user_id: str, since: datetime) -> bool:
+    """
+    A clear job is active for the user, or made progress since `since`
+    """
+    job = await jobs.find_one(
+        {
+            "user_id": user_id,
+            "type": CLEAR_JOB,
+            "$or": [
+                {"status": {"$in": ACTIVE}},
+                {"updated_at": {"$gte": since}}
+            ]
+        },
+        {"_id": 1}
+    )
+    return job is not None
+
+
+# ----------------------------------------
+# READ BOTH TIERS
+# ----------------------------------------
+async def archived_until(user_id: str) -> Optional[datetime]:
+    """
+    created_at of the user's newest archived entry, None -> no archive
+    """
+    bucket = await history_archive.find_one(
+        {"user_id": user_id},
+        {"newest_at": 1},
+        sort=[("newest_at", -1)]
+    )
+    return bucket["newest_at"] if bucket else None
+
+
+async def _load_bucket(bucket_id) -> List[dict]:
+    bucket = await history_archive.find_one({"_id": bucket_id}, {"blob": 1})
+    if bucket is None:
+        # removed meanwhile (clear / TTL)
+        return []
+    return unpack_entries(bucket["blob"])
+
+
+async def read_archived(
+    user_id: str,
+    need: int,
+    before: Optional[tuple] = None
+) -> List[dict]:
+    """
+    Newest archived entries (at least `need` when there are that many),
+    strictly older than `before` = (created_at, _id).
+    Buckets are decompressed newest first and only until no
+    remaining bucket can still reach into the first `need`.
+    """
+    query = {"user_id": user_id}
+    if before is not None:
+        query["oldest_at"] = {"$lte": before[0]}
+
+    buckets = history_archive.find(query, BUCKET_META).sort("newest_at", -1)
+
+    entries = []
+    async for bucket in buckets:
+        if len(entries) >= need and bucket["newest_at"] < entries[need - 1]["created_at"]:
+            break
+        for entry in await _load_bucket(bucket["_id"]):
+            if before is None or _key(entry) < before:
+                entries.append(entry)
+        entries.sort(key=_key, reverse=True)
+
+    return entries
+
+
+async def read_history(
+    user_id: str,
+    limit: int,
+    skip: int = 0,
+    after: Optional[str] = None
+) -> List[dict]:
+    """
+    One page of history (newest first) across hot and cold tiers.
+    The archive is only read when the page runs past the hot tier.
+    """
+    query = {"user_id": user_id}
+    before = None
+
+    # cursor mode ignores skip
+    if after:
+        before = decode_cursor(after)
+        query = after_cursor_query(query, after)
+        skip = 0
+
+    cursor = (
+        history
+        .find(query)
+        .sort(NEWEST_FIRST)
+        .skip(skip)
+        .limit(limit)
+    )
+    hot = [item async for item in cursor]
+    # archived entries are older than any hot one: a full page is done
+    if limit <= 0 or len(hot) == limit:
+        return hot
+
+    archive_skip = 0
+    if skip:
+        hot_total = await history.count_documents({"user_id": user_id})
+        archive_skip = max(0, skip - hot_total)
+
+    archived = await read_archived(
+        user_id,
+        need=archive_skip + limit,
+        before=before
+    )
+    if not archived:
+        return hot
+
+    seen = {item["_id"] for item in hot}
+    merged = hot + [
+        entry for entry in archived[archive_skip:]
+        if entry["_id"] not in seen
+    ]
+    merged.sort(key=_key, reverse=True)
+    return merged[:limit]
+
+
+async def iter_archived(
+    user_id: str,
+    before: Optional[tuple] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> AsyncIterator[dict]:
+    """
+    Every archived entry in range, newest first, one bucket
+    decompressed at a time (exports)
+    """
+    query = {"user_id": user_id}
+    oldest_at = {}
+    if before is not None:
+        oldest_at["$lte"] = before[0]
+    if until is not None:
+        oldest_at["$lt"] = until
+    if oldest_at:
+        query["oldest_at"] = oldest_at
+    if since is not None:
+        query["newest_at"] = {"$gte": since}
+
+    buckets = history_archive.find(query, BUCKET_META).sort("newest_at", -1)
+    async for bucket in buckets:
+        entries = [
+            entry for entry in await _load_bucket(bucket["_id"])
+            if (before is None or _key(entry) < before)
+            and (since is None or entry["created_at"] >= since)
+            and (until is None or entry["created_at"] < until)
+        ]
+        entries.sort(key=_key, reverse=True)
+        for entry in entries:
+            yield entry
@@ -0,0 +1,322 @@
+"""
+History Lifecycle
+-----------------
+- Clear history as a background job: bounded _id-ordered chunks,
+  throttled, progress kept in the jobs collection for polling
+- Jobs survive restarts: unfinished ones are resumed on startup,
+  stale ones (no progress) can be taken over by another worker
+- Per-plan retention: history documents (and archive buckets)
+  carry expires_at and the TTL index removes them; plan changes
+  move a user's existing documents in / out of retention
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+from core.config import (
+    SUBSCRIPTION_PLANS,
+    HISTORY_DELETE_CHUNK_SIZE,
+    HISTORY_DELETE_PAUSE_MS,
+    HISTORY_JOB_STALE_SECONDS,
+    HISTORY_JOB_KEEP_DAYS
+)
+from db.mongo import history, history_archive, jobs
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLEAR_JOB = "history_clear"
+ACTIVE = ["queued", "running"]
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+history_deleted_total = registry.counter(
+    "blackbrain_history_deleted_total",
+    "History documents removed by clear jobs"
+)
+
+_tasks = set()
+# job ids with a task in this process (one runner per job per worker)
+_running = set()
+
+
+# ----------------------------------------
+# RETENTION (TTL)
+# ----------------------------------------
+def retention_days(plan: str) -> Optional[int]:
+    """
+    None -> history kept forever
+    """
+    return SUBSCRIPTION_PLANS.get(plan, {}).get("history_retention_days")
+
+
+def retention_fields(plan: str, created_at: datetime) -> dict:
+    """
+    Extra history document fields for the plan's retention
+    """
+    days = retention_days(plan)
+    if days is None:
+        return {}
+    return {"expires_at": created_at + timedelta(days=days)}
+
+
+async def apply_plan_retention(user_ids: List[str], plan: str):
+    """
+    After a plan change: unlimited plans take existing docs out of
+    TTL; limited plans give untimed docs the full window from now.
+    """
+    if not user_ids:
+        return
+
+    days = retention_days(plan)
+    # archived buckets follow the same rule as hot documents
+    for collection in (history, history_archive):
+        if days is None:
+            await collection.update_many(
+                {"user_id": {"$in": user_ids}, "expires_at": {"$exists": True}},
+                {"$unset": {"expires_at": ""}}
+            )
+        else:
+            await collection.update_many(
+                {"user_id": {"$in": user_ids}, "expires_at": {"$exists": False}},
+                {"$set": {"expires_at": datetime.utcnow() + timedelta(days=days)}}
+            )
+
+
+# ----------------------------------------
+# CLEAR JOBS
+# ----------------------------------------
+def _job_view(job: dict) -> dict:
+    return {
+        "job_id": str(job["_id"]),
+        "type": job["type"],
+        "status": job["status"],
+        "deleted": job.get("deleted", 0),
+        "chunks": job.get("chunks", 0),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "error": job.get("error")
+    }
+
+
+def _spawn(job_id: ObjectId):
+    if job_id in _running:
+        # the running task picks up a moved cutoff by itself
+        return
+    _running.add(job_id)
+    task = asyncio.create_task(_run_clear_job(job_id))
+    task.add_done_callback(lambda _: _running.discard(job_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def start_history_clear(user_id: str) -> dict:
+    """
+    Queues a clear of everything created up to now.
+    A second clear while one is active reuses that job and
+    tries to run it here too: _claim lets it through only when
+    the owner is gone (stale), so an orphaned job gets reclaimed.
+    """
+    now = datetime.utcnow()
+
+    active = await jobs.find_one_and_update(
+        {"user_id": user_id, "type": CLEAR_JOB, "status": {"$in": ACTIVE}},
+        {"$set": {"cutoff": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if active is not None:
+        _spawn(active["_id"])
+        return _job_view(active)
+
+    job = {
+        "type": CLEAR_JOB,
+        "user_id": user_id,
+        "status": "queued",
+        "cutoff": now,
+        "deleted": 0,
+        "chunks": 0,
+        "owner": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    result = await jobs.insert_one(job)
+    job["_id"] = result.inserted_id
+
+    _spawn(job["_id"])
+    return _job_view(job)
+
+
+async def get_job(job_id: str, user_id: str) -> dict:
+    try:
+        oid = ObjectId(job_id)
+    except (InvalidId, TypeError):
+        oid = None
+
+    job = await jobs.find_one({"_id": oid, "user_id": user_id}) if oid else None
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return _job_view(job)
+
+
+async def _claim(job_id: ObjectId) -> Optional[dict]:
+    now = datetime.utcnow()
+    return await jobs.find_one_and_update(
+        {
+            "_id": job_id,
+            "status": {"$in": ACTIVE},
+            "$or": [
+                {"owner": None},
+                {"owner": WORKER_ID},
+                {"updated_at": {"$lt": now - timedelta(seconds=HISTORY_JOB_STALE_SECONDS)}}
+            ]
+        },
+        {"$set": {"owner": WORKER_ID, "status": "running", "updated_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def _finish(job_id: ObjectId, fields: dict, cutoff: datetime = None) -> bool:
+    """
+    False when the cutoff moved meanwhile (repeat clear) -> keep going
+    """
+    now = datetime.utcnow()
+    query = {"_id": job_id, "owner": WORKER_ID}
+    if cutoff is not None:
+        query["cutoff"] = cutoff
+
+    result = await jobs.update_one(
+        query,
+        {"$set": {
+            **fields,
+            "finished_at": now,
+            "updated_at": now,
+            "expires_at": now + timedelta(days=HISTORY_JOB_KEEP_DAYS)
+        }}
+    )
+    return result.modified_count > 0
+
+
+async def _delete_chunks(job_id: ObjectId, user_id: str, cutoff: datetime, last_id):
+    pause = HISTORY_DELETE_PAUSE_MS / 1000
+
+    while True:
+        query = {"user_id": user_id, "created_at": {"$lte": cutoff}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        cursor = (
+            history
+            .find(query, {"_id": 1})
+            .sort("_id", 1)
+            .limit(HISTORY_DELETE_CHUNK_SIZE)
+        )
+        ids = [doc["_id"] async for doc in cursor]
+        if not ids:
+            return
+
+        result = await history.delete_many({"_id": {"$in": ids}})
+        last_id = ids[-1]
+        history_deleted_total.inc(amount=result.deleted_count)
+
+        await jobs.update_one(
+            {"_id": job_id, "owner": WORKER_ID},
+            {
+                "$inc": {"deleted": result.deleted_count, "chunks": 1},
+                "$set": {"last_id": last_id, "updated_at": datetime.utcnow()}
+            }
+        )
+
+        if len(ids) < HISTORY_DELETE_CHUNK_SIZE:
+            return
+        await asyncio.sleep(pause)
+
+
+async def _delete_archived(job_id: ObjectId, user_id: str, cutoff: datetime):
+    """
+    Archived buckets only hold entries older than the hot tier:
+    one delete per bucket, counted by entries
+    """
+    cursor = history_archive.find(
+        {"user_id": user_id, "oldest_at": {"$lte": cutoff}},
+        {"_id": 1, "count": 1}
+    )
+    async for bucket in cursor:
+        result = await history_archive.delete_one({"_id": bucket["_id"]})
+        if not result.deleted_count:
+            continue
+        history_deleted_total.inc(amount=bucket["count"])
+        await jobs.update_one(
+            {"_id": job_id, "owner": WORKER_ID},
+            {
+                "$inc": {"deleted": bucket["count"], "chunks": 1},
+                "$set": {"updated_at": datetime.utcnow()}
+            }
+        )
+
+
+async def _run_clear_job(job_id: ObjectId):
+    job = await _claim(job_id)
+    if job is None:
+        return
+
+    if job.get("started_at") is None:
+        await jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"started_at": datetime.utcnow()}}
+        )
+
+    try:
+        while True:
+            await _delete_chunks(
+                job_id,
+                job["user_id"],
+                job["cutoff"],
+                job.get("last_id")
+            )
+            await _delete_archived(job_id, job["user_id"], job["cutoff"])
+            if await _finish(job_id, {"status": "done"}, cutoff=job["cutoff"]):
+                return
+            # a repeat clear moved the cutoff: one more pass
+            job = await jobs.find_one({"_id": job_id})
+            if job is None or job.get("owner") != WORKER_ID:
+                return
+            job["last_id"] = None
+
+    except asyncio.CancelledError:
+        # shutdown: job stays "running", resumed on next start
+        raise
+    except Exception as e:
+        logger.exception("History clear job %s failed", job_id)
+        await _finish(job_id, {"status": "failed", "error": str(e)})
+
+
+# ----------------------------------------
+# LIFESPAN HOOKS
+# ----------------------------------------
+async def resume_history_jobs():
+    """
+    Picks up clears left unfinished by a restart / crashed worker
+    """
+    cursor = jobs.find({"type": CLEAR_JOB, "status": {"$in": ACTIVE}}, {"_id": 1})
+    async for job in cursor:
+        _spawn(job["_id"])
+
+
+async def stop_history_jobs():
+    for task in list(_tasks):
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
@@ -0,0 +1,121 @@
+"""
+Identity Cache
+--------------
+- Verified JWT claims (keyed by token)
+- User projection: email, plan, plan_expiry (keyed by user id)
+- Explicit invalidation when a user's plan changes
+- Other workers' writes arrive through the invalidation bus;
+  without change streams user entries fall back to a short TTL
+"""
+
+import time
+from typing import Optional
+
+from core.config import (
+    IDENTITY_CACHE_TTL_SECONDS,
+    IDENTITY_CACHE_MAX_ENTRIES,
+    INVALIDATION_FALLBACK_TTL_SECONDS
+)
+from utils.cache import TTLCache
+
+# ----------------------------------------
+# CACHES
+# ----------------------------------------
+token_cache = TTLCache(
+    max_entries=IDENTITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=IDENTITY_CACHE_TTL_SECONDS
+)
+user_cache = TTLCache(
+    max_entries=IDENTITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=IDENTITY_CACHE_TTL_SECONDS
+)
+
+USER_PROJECTION = {"email": 1, "plan": 1, "plan_expiry": 1}
+
+
+# ----------------------------------------
+# TOKEN CLAIMS
+# ----------------------------------------
+def get_cached_claims(token: str) -> Optional[dict]:
+    return token_cache.get(token)
+
+
+def cache_claims(token: str, claims: dict):
+    """
+    Never keeps a token longer than its own "exp"
+    """
+    ttl = IDENTITY_CACHE_TTL_SECONDS
+
+    exp = claims.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+
+    token_cache.set(token, claims, ttl_seconds=ttl)
+
+
+# ----------------------------------------
+# USER PROJECTION
+# ----------------------------------------
+def get_cached_user(user_id: str) -> Optional[dict]:
+    return user_cache.get(user_id)
+
+
+def cache_user(user_id: str, user: dict):
+    user_cache.set(user_id, {
+        "email": user.get("email"),
+        "plan": user.get("plan", "free"),
+        "plan_expiry": user.get("plan_expiry")
+    })
+
+
+# ----------------------------------------
+# INVALIDATION
+# ----------------------------------------
+def invalidate_user(user_id: str):
+    """
+    Call after any write that changes a user's plan.
+    Cached tokens only hold claims, so dropping the
+    user entry is enough to force a fresh read.
+    """
+    user_cache.pop(str(user_id))
+
+
+def clear_identity_cache():
+    token_cache.clear()
+    user_cache.clear()
+
+
+def on_user_change(event: dict):
+    """
+    Invalidation bus handler (users collection)
+    """
+    if event["op"] == "reset":
+        user_cache.clear()
+    elif event["id"] is not None:
+        invalidate_user(event["id"])
+
+
+def on_invalidation_mode(live: bool):
+    """
+    Full TTL only while another worker's plan change can reach us.
+    Token claims hold no plan data and keep their TTL.
+    """
+    if live:
+        user_cache.ttl_seconds = IDENTITY_CACHE_TTL_SECONDS
+    else:
+        user_cache.ttl_seconds = min(
+            IDENTITY_CACHE_TTL_SECONDS,
+            INVALIDATION_FALLBACK_TTL_SECONDS
+        )
+        # entries cached with the long TTL could be stale for a minute
+        user_cache.clear()
+
+
+# ----------------------------------------
+# STATS
+# ----------------------------------------
+def identity_cache_stats() -> dict:
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats()
+    }
@@ -0,0 +1,190 @@
+"""
+Invalidation Bus
+----------------
+Cross-worker cache invalidation over Mongo change streams.
+
+- One change stream per watched collection (users, settings)
+- Changes fan out to the local handlers registered for it
+  (identity cache drop, entitlement reload)
+- Resume token kept per stream: a dropped connection resumes
+  where it left off, no missed writes
+- Resume history lost -> handlers get a "reset" (drop everything)
+- No change streams (standalone mongod, memory backend) ->
+  listeners switch caches to short TTLs, streams re-probed now and then
+"""
+
+import asyncio
+import inspect
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from core.config import (
+    INVALIDATION_RETRY_SECONDS,
+    INVALIDATION_PROBE_SECONDS
+)
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WATCHED_OPS = ["insert", "update", "replace", "delete"]
+# $changeStream needs a replica set / sharded cluster
+UNSUPPORTED_CODES = {40573, 40324}
+# resume token too old / unusable -> events were missed
+HISTORY_LOST_CODES = {260, 280, 286}
+
+invalidation_events = registry.counter(
+    "blackbrain_invalidation_events_total",
+    "Change stream events fanned out to local caches",
+    labels=("collection",)
+)
+
+
+class InvalidationBus:
+
+    def __init__(
+        self,
+        retry_seconds: float = INVALIDATION_RETRY_SECONDS,
+        probe_seconds: float = INVALIDATION_PROBE_SECONDS
+    ):
+        self.retry_seconds = retry_seconds
+        self.probe_seconds = probe_seconds
+
+        self._collections = {}
+        self._handlers: Dict[str, List[Callable]] = defaultdict(list)
+        self._mode_listeners: List[Callable] = []
+        self._tokens = {}
+        self._live = {}
+        self._tasks = []
+
+        self.events = defaultdict(int)
+        self.restarts = 0
+        self.resets = 0
+        self.last_error = None
+
+    # -------------------------
+    # REGISTRATION
+    # -------------------------
+    def subscribe(self, collection, handler: Callable):
+        """
+        handler({"collection", "op", "id"}) on every change;
+        op "reset" means changes may have been missed.
+        Sync or async.
+        """
+        self._collections[collection.name] = collection
+        self._handlers[collection.name].append(handler)
+
+    def on_mode(self, listener: Callable):
+        """
+        listener(live: bool): True once every stream is open,
+        False while any of them is down / unsupported
+        """
+        self._mode_listeners.append(listener)
+
+    @property
+    def live(self) -> bool:
+        return bool(self._live) and all(self._live.values())
+
+    def _set_live(self, name: str, value: bool):
+        before = self.live
+        self._live[name] = value
+        if self.live != before:
+            logger.info("Invalidation bus %s", "live" if self.live else "in TTL fallback")
+            for listener in self._mode_listeners:
+                listener(self.live)
+
+    # -------------------------
+    # DISPATCH
+    # -------------------------
+    async def _dispatch(self, name: str, op: str, doc_id=None):
+        event = {"collection": name, "op": op, "id": doc_id}
+        self.events[name] += 1
+        invalidation_events.inc(name)
+
+        for handler in self._handlers[name]:
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Invalidation handler failed for %s", name)
+
+    # -------------------------
+    # STREAMS
+    # -------------------------
+    async def _open_and_tail(self, name: str, collection):
+        pipeline = [{"$match": {"operationType": {"$in": WATCHED_OPS}}}]
+
+        async with collection.watch(
+            pipeline,
+            resume_after=self._tokens.get(name)
+        ) as stream:
+            if stream.resume_token is not None:
+                self._tokens[name] = stream.resume_token
+            self._set_live(name, True)
+            async for change in stream:
+                key = change.get("documentKey", {}).get("_id")
+                await self._dispatch(
+                    name,
+                    change["operationType"],
+                    str(key) if key is not None else None
+                )
+                self._tokens[name] = stream.resume_token
+
+    async def _watch(self, name: str, collection):
+        while True:
+            delay = self.retry_seconds
+            try:
+                await self._open_and_tail(name, collection)
+            except asyncio.CancelledError:
+                raise
+            except NotImplementedError as e:
+                self.last_error = str(e)
+                delay = self.probe_seconds
+            except OperationFailure as e:
+                self.last_error = str(e)
+                if e.code in UNSUPPORTED_CODES:
+                    delay = self.probe_seconds
+                elif e.code in HISTORY_LOST_CODES:
+                    # start fresh; whatever changed meanwhile is unknown
+                    self._tokens.pop(name, None)
+                    self.resets += 1
+                    await self._dispatch(name, "reset")
+            except PyMongoError as e:
+                self.last_error = str(e)
+            except Exception as e:
+                logger.exception("Change stream on %s failed", name)
+                self.last_error = str(e)
+
+            self._set_live(name, False)
+            self.restarts += 1
+            await asyncio.sleep(delay)
+
+    def start(self):
+        for name, collection in self._collections.items():
+            self._live.setdefault(name, False)
+            self._tasks.append(asyncio.create_task(self._watch(name, collection)))
+        # caches run in fallback mode until the streams are open
+        for listener in self._mode_listeners:
+            listener(self.live)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "live": self.live,
+            "streams": dict(self._live),
+            "events": dict(self.events),
+            "restarts": self.restarts,
+            "resets": self.resets,
+            "last_error": self.last_error
+        }
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,167 @@
+"""
+Payment Gateway
+---------------
+Razorpay behind a small async interface.
+
+- The razorpay SDK is sync (requests): every network call runs on a
+  bounded executor with a timeout, never on the event loop
+- Signatures (checkout + webhook) are HMAC-SHA256, checked locally
+- FakeGateway: in-process stand-in with the same signatures,
+  for tests and offline dev (PAYMENT_GATEWAY=fake)
+"""
+
+import hashlib
+import hmac
+import time
+import uuid
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from core.config import (
+    PAYMENT_GATEWAY,
+    RAZORPAY_KEY_ID,
+    RAZORPAY_KEY_SECRET,
+    RAZORPAY_WEBHOOK_SECRET,
+    RAZORPAY_WORKERS,
+    RAZORPAY_MAX_PENDING,
+    RAZORPAY_QUEUE_TIMEOUT_MS,
+    RAZORPAY_TIMEOUT_SECONDS,
+    FAKE_GATEWAY_LATENCY_MS
+)
+from utils.executor import BoundedExecutor
+
+
+# ----------------------------------------
+# SIGNATURES
+# ----------------------------------------
+def hmac_sha256(secret: str, message: bytes) -> str:
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def payment_signature(order_id: str, payment_id: str, secret: str = RAZORPAY_KEY_SECRET) -> str:
+    """
+    Checkout signature: HMAC(key_secret, "order_id|payment_id")
+    """
+    return hmac_sha256(secret, f"{order_id}|{payment_id}".encode())
+
+
+def valid_payment_signature(order_id: str, payment_id: str, signature: str) -> bool:
+    return hmac.compare_digest(payment_signature(order_id, payment_id), signature or "")
+
+
+def valid_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """
+    Webhook signature: HMAC(webhook_secret, raw body)
+    """
+    if not RAZORPAY_WEBHOOK_SECRET or not signature:
+        return False
+    return hmac.compare_digest(hmac_sha256(RAZORPAY_WEBHOOK_SECRET, body), signature)
+
+
+# ----------------------------------------
+# GATEWAYS (SYNC, RUN ON THE EXECUTOR)
+# ----------------------------------------
+class RazorpayGateway:
+
+    name = "razorpay"
+
+    def __init__(self):
+        self._client = None
+
+    def _get_client(self):
+        # razorpay pulls in requests & co: built on the first call
+        if self._client is None:
+            import razorpay
+
+            self._client = razorpay.Client(
+                auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET)
+            )
+        return self._client
+
+    def create_order(self, data: dict) -> dict:
+        # requests-level timeout too, so the worker thread is freed
+        return self._get_client().order.create(data, timeout=RAZORPAY_TIMEOUT_SECONDS)
+
+
+class FakeGateway:
+    """
+    Orders live in memory; pay() returns what checkout would hand
+    to the frontend (payment id + valid signature)
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: int = FAKE_GATEWAY_LATENCY_MS):
+        self.latency = latency_ms / 1000
+        self.orders = {}
+        self.calls = 0
+
+    def create_order(self, data: dict) -> dict:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        order = {
+            "id": f"order_fake{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "status": "created",
+            "created_at": int(time.time()),
+            **data
+        }
+        self.orders[order["id"]] = order
+        return order
+
+    def pay(self, order_id: str) -> dict:
+        payment_id = f"pay_fake{uuid.uuid4().hex[:14]}"
+        self.orders[order_id]["status"] = "paid"
+        return {
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": payment_signature(order_id, payment_id)
+        }
+
+
+def build_gateway(name: str = PAYMENT_GATEWAY):
+    if name == "fake":
+        return FakeGateway()
+    return RazorpayGateway()
+
+
+gateway = build_gateway()
+
+gateway_executor = BoundedExecutor(
+    name="payment-gateway",
+    max_workers=RAZORPAY_WORKERS,
+    max_pending=RAZORPAY_MAX_PENDING,
+    queue_timeout_ms=RAZORPAY_QUEUE_TIMEOUT_MS
+)
+
+
+# ----------------------------------------
+# ASYNC API
+# ----------------------------------------
+async def create_gateway_order(data: dict) -> dict:
+    """
+    Busy pool -> 503, slow gateway -> 504, gateway error -> 502
+    """
+    try:
+        return await gateway_executor.run(
+            gateway.create_order,
+            data,
+            timeout=RAZORPAY_TIMEOUT_SECONDS
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Payment gateway error: {e}"
+        )
+
+
+def gateway_stats() -> dict:
+    return {
+        "gateway": gateway.name,
+        **gateway_executor.stats()
+    }
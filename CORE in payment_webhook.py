@@ -0,0 +1,247 @@
+"""
+Payment Webhook Pipeline
+------------------------
+- Signature checked on the raw body, then the event is recorded
+  under its gateway event id (_id): a redelivery hits the duplicate
+  key and is acked without doing anything
+- The request is acked right after the insert; the plan change
+  runs in a background task
+- Failures are retried with backoff (and on gateway redelivery);
+  only terminal events get expires_at, "dead" ones are kept
+- Unprocessed events (crash / restart) are picked up on startup;
+  activation is idempotent per payment id, so a replay is harmless
+"""
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from core.config import (
+    SUBSCRIPTION_PLANS,
+    PAYMENT_EVENT_KEEP_DAYS,
+    PAYMENT_EVENT_MAX_ATTEMPTS,
+    PAYMENT_EVENT_RETRY_BASE_SECONDS,
+    PAYMENT_EVENT_RETRY_MAX_SECONDS,
+    PAYMENT_EVENT_STALE_SECONDS
+)
+from core.payment import activate_plan
+from db.mongo import payment_events
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# events that mean "money received for this order"
+ACTIVATING_EVENTS = {"payment.captured", "order.paid"}
+# not applied yet: picked up by retries, redeliveries and startup
+RETRYABLE = ["pending", "processing", "failed"]
+
+payment_events_total = registry.counter(
+    "blackbrain_payment_events_total",
+    "Gateway webhook events by outcome",
+    labels=("outcome",)
+)
+
+_tasks = set()
+# backoff sleeps, cancelled on shutdown (resumed on next start)
+_retries = set()
+
+
+# ----------------------------------------
+# INGEST
+# ----------------------------------------
+def event_id_for(body: bytes, header_id: Optional[str]) -> str:
+    """
+    Gateway event id; body hash when the header is missing
+    (identical redeliveries still dedupe)
+    """
+    return header_id or "sha256:" + hashlib.sha256(body).hexdigest()
+
+
+async def record_event(event_id: str, payload: dict) -> bool:
+    """
+    False when this event was already received
+    """
+    try:
+        await payment_events.insert_one({
+            "_id": event_id,
+            "event": payload.get("event"),
+            "payload": payload,
+            "status": "pending",
+            "received_at": datetime.utcnow()
+        })
+    except DuplicateKeyError:
+        payment_events_total.inc("duplicate")
+        return False
+    return True
+
+
+def schedule_event(event_id: str, delay: float = 0):
+    """
+    Safe to call for any event: process_event only claims
+    events that still need work
+    """
+    if delay:
+        task = asyncio.create_task(_process_later(event_id, delay))
+        _retries.add(task)
+        task.add_done_callback(_retries.discard)
+        return
+
+    task = asyncio.create_task(process_event(event_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _process_later(event_id: str, delay: float):
+    await asyncio.sleep(delay)
+    schedule_event(event_id)
+
+
+def retry_delay(attempts: int) -> float:
+    return min(
+        PAYMENT_EVENT_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        PAYMENT_EVENT_RETRY_MAX_SECONDS
+    )
+
+
+# ----------------------------------------
+# APPLY
+# ----------------------------------------
+def _entity(payload: dict, name: str) -> dict:
+    return (payload.get("payload", {}).get(name) or {}).get("entity") or {}
+
+
+async def apply_event(payload: dict) -> str:
+    if payload.get("event") not in ACTIVATING_EVENTS:
+        return "ignored"
+
+    payment = _entity(payload, "payment")
+    order = _entity(payload, "order")
+    # order notes are set by create_payment_order
+    notes = order.get("notes") or payment.get("notes") or {}
+
+    user_id = notes.get("user_id")
+    plan_code = notes.get("plan_code")
+    if not user_id or plan_code not in SUBSCRIPTION_PLANS or not payment.get("id"):
+        return "ignored"
+
+    expected = SUBSCRIPTION_PLANS[plan_code].get("price", 0) * 100
+    if payment.get("amount") != expected:
+        logger.warning("Payment %s amount does not match plan %s", payment["id"], plan_code)
+        return "amount_mismatch"
+
+    expiry = await activate_plan(
+        user_id,
+        plan_code,
+        payment["id"],
+        order_id=payment.get("order_id") or order.get("id")
+    )
+    return "applied" if expiry else "already_applied"
+
+
+async def process_event(event_id: str):
+    now = datetime.utcnow()
+    event = await payment_events.find_one_and_update(
+        {
+            "_id": event_id,
+            "$or": [
+                {"status": {"$in": ["pending", "failed"]}},
+                # worker died mid-apply
+                {"status": "processing", "updated_at": {
+                    "$lt": now - timedelta(seconds=PAYMENT_EVENT_STALE_SECONDS)
+                }}
+            ]
+        },
+        {
+            "$set": {"status": "processing", "updated_at": now},
+            "$inc": {"attempts": 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if event is None:
+        return
+
+    try:
+        outcome = await apply_event(event["payload"])
+    except Exception as e:
+        logger.exception("Payment event %s failed (attempt %s)", event_id, event["attempts"])
+        await _failed(event_id, event["attempts"], str(e))
+        return
+
+    now = datetime.utcnow()
+    await payment_events.update_one(
+        {"_id": event_id},
+        {
+            "$set": {
+                "status": "processed",
+                "outcome": outcome,
+                "processed_at": now,
+                "updated_at": now,
+                "expires_at": now + timedelta(days=PAYMENT_EVENT_KEEP_DAYS)
+            },
+            "$unset": {"error": "", "next_attempt_at": ""}
+        }
+    )
+    payment_events_total.inc(outcome)
+
+
+async def _failed(event_id: str, attempts: int, error: str):
+    """
+    Back to retryable with backoff; "dead" after the last attempt
+    (kept, no expires_at: a paid plan may be missing)
+    """
+    now = datetime.utcnow()
+    if attempts >= PAYMENT_EVENT_MAX_ATTEMPTS:
+        await payment_events.update_one(
+            {"_id": event_id},
+            {"$set": {"status": "dead", "error": error, "updated_at": now}}
+        )
+        logger.error("Payment event %s gave up after %s attempts", event_id, attempts)
+        payment_events_total.inc("dead")
+        return
+
+    delay = retry_delay(attempts)
+    await payment_events.update_one(
+        {"_id": event_id},
+        {"$set": {
+            "status": "failed",
+            "error": error,
+            "updated_at": now,
+            "next_attempt_at": now + timedelta(seconds=delay)
+        }}
+    )
+    payment_events_total.inc("failed")
+    schedule_event(event_id, delay=delay)
+
+
+# ----------------------------------------
+# LIFESPAN HOOKS
+# ----------------------------------------
+async def resume_payment_events():
+    now = datetime.utcnow()
+    cursor = payment_events.find(
+        {"status": {"$in": RETRYABLE}},
+        {"status": 1, "updated_at": 1, "next_attempt_at": 1}
+    )
+    async for event in cursor:
+        due = event.get("next_attempt_at")
+        if event["status"] == "processing":
+            # claimable once its owner counts as stale
+            due = event.get("updated_at", now) + timedelta(seconds=PAYMENT_EVENT_STALE_SECONDS)
+        delay = max(0.0, (due - now).total_seconds()) if due else 0
+        schedule_event(event["_id"], delay=delay)
+
+
+async def stop_payment_events():
+    """
+    Lets in-flight plan changes finish (they are short);
+    pending backoff sleeps are dropped and resumed on next start
+    """
+    for task in list(_retries):
+        task.cancel()
+    if _tasks or _retries:
+        await asyncio.gather(*_tasks, *_retries, return_exceptions=True)
@@ -2,10 +2,26 @@
 Plan Guard
 ----------
 Controls access based on user's subscription plan.
+
+- One entitlement model: brain modes + plan features
+  (SUBSCRIPTION_PLANS feature names are mapped onto modes)
+- Compiled into one bitmask per plan, each check is a single AND
+- Expired paid plans are treated as "free"
+- Table can be reloaded from Mongo settings collection
+  (document _id="entitlements") without a restart
 """
 
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
 from fastapi import HTTPException, status
 
+from core.config import SUBSCRIPTION_PLANS
+
+logger = logging.getLogger(__name__)
+
 # ----------------------------------------
 # FEATURE ACCESS MAP
 # ----------------------------------------
@@ -33,6 +49,157 @@ PLAN_FEATURES = {
     ]
 }
 
+# SUBSCRIPTION_PLANS feature name -> brain mode
+FEATURE_ALIASES = {
+    "decision_brain": "decision",
+    "study_brain": "study",
+    "money_brain_basic": "money",
+    "money_brain_advanced": "money",
+    "no_bullshit_mode": "nobullshit",
+    "all_features": "all"
+}
+
+ALL = -1  # every bit set
+
+
+# ----------------------------------------
+# COMPILED TABLE
+# ----------------------------------------
+class EntitlementTable:
+
+    def __init__(
+        self,
+        plans: Dict[str, Iterable[str]],
+        version: Optional[int] = None
+    ):
+        self.version = version
+        self.bits: Dict[str, int] = {}
+        self.masks: Dict[str, int] = {}
+
+        for plan, features in plans.items():
+            mask = 0
+            for feature in features:
+                feature = FEATURE_ALIASES.get(feature, feature)
+                if feature == "all":
+                    mask = ALL
+                    continue
+                if feature not in self.bits:
+                    self.bits[feature] = 1 << len(self.bits)
+                mask |= self.bits[feature]
+            self.masks[plan] = mask
+
+    def allows(self, plan: str, feature: str) -> Optional[bool]:
+        """
+        None -> unknown plan
+        """
+        mask = self.masks.get(plan)
+        if mask is None:
+            return None
+        if mask == ALL:
+            return True
+
+        bit = self.bits.get(feature)
+        return bit is not None and bool(mask & bit)
+
+
+def default_plan_entitlements() -> Dict[str, list]:
+    """
+    Union of PLAN_FEATURES (modes) and SUBSCRIPTION_PLANS features
+    """
+    plans = {}
+    for plan in set(PLAN_FEATURES) | set(SUBSCRIPTION_PLANS):
+        plans[plan] = (
+            list(PLAN_FEATURES.get(plan, []))
+            + list(SUBSCRIPTION_PLANS.get(plan, {}).get("features", []))
+        )
+    return plans
+
+
+entitlements = EntitlementTable(default_plan_entitlements())
+
+
+# ----------------------------------------
+# RELOAD (SETTINGS COLLECTION)
+# ----------------------------------------
+async def reload_entitlements(settings_collection) -> bool:
+    """
+    Reads {"_id": "entitlements", "version": n, "plans": {plan: [...]}}.
+    Swaps the table only when the version changed.
+    Plans the doc leaves out keep their built-in features, so a partial
+    doc can't lock users (e.g. everyone on "free") out.
+    """
+    global entitlements
+
+    doc = await settings_collection.find_one({"_id": "entitlements"})
+    if not doc or not doc.get("plans"):
+        return False
+
+    version = doc.get("version", 0)
+    if version == entitlements.version:
+        return False
+
+    plans = default_plan_entitlements()
+    missing = sorted(set(plans) - set(doc["plans"]))
+    if missing:
+        logger.warning(
+            "Entitlements version %s has no %s, using built-in defaults",
+            version, ", ".join(missing)
+        )
+    plans.update(doc["plans"])
+
+    entitlements = EntitlementTable(plans, version=version)
+    logger.info("Entitlements reloaded (version %s)", version)
+    return True
+
+
+def entitlements_listener(settings_collection):
+    """
+    Invalidation bus handler (settings collection): reload as soon
+    as the entitlements document changes; polling stays as backstop
+    """
+    async def on_settings_change(event: dict):
+        if event["op"] == "reset" or event["id"] == "entitlements":
+            await reload_entitlements(settings_collection)
+
+    return on_settings_change
+
+
+async def refresh_entitlements_forever(settings_collection, interval: float):
+    while True:
+        try:
+            await reload_entitlements(settings_collection)
+        except Exception:
+            logger.exception("Entitlement reload failed")
+        await asyncio.sleep(interval)
+
+
+# ----------------------------------------
+# PLAN EXPIRY
+# ----------------------------------------
+def effective_plan(
+    user_plan: str,
+    plan_expiry: Optional[datetime] = None
+) -> str:
+    """
+    Paid plan past its expiry counts as free
+    """
+    if (
+        user_plan != "free"
+        and plan_expiry is not None
+        and plan_expiry <= datetime.utcnow()
+    ):
+        return "free"
+    return user_plan
+
+
+def has_entitlement(
+    user_plan: str,
+    feature: str,
+    plan_expiry: Optional[datetime] = None
+) -> bool:
+    plan = effective_plan(user_plan, plan_expiry)
+    return bool(entitlements.allows(plan, feature))
+
 
 # ----------------------------------------
 # PLAN CHECK FUNCTION
@@ -40,26 +207,25 @@ PLAN_FEATURES = {
 
 def check_plan_access(
     user_plan: str,
-    requested_mode: str
+    requested_mode: str,
+    plan_expiry: Optional[datetime] = None
 ):
     """
     Raises error if plan does not allow requested feature
     """
-    allowed_features = PLAN_FEATURES.get(user_plan)
+    plan = effective_plan(user_plan, plan_expiry)
+    allowed = entitlements.allows(plan, requested_mode)
 
-    if not allowed_features:
+    if allowed is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid subscription plan"
         )
 
-    if "all" in allowed_features:
-        return True
-
-    if requested_mode not in allowed_features:
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Upgrade your plan to access this feature"
         )
 
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,350 @@
+"""
+Response Cache
+--------------
+Cache in front of the model-backed brain modes (AI_MODES),
+keyed on (mode, normalized question).
+
+- LRU + TTL eviction, entry cap and memory (bytes) cap
+- Near-duplicate lookup: 64-bit SimHash over content-word shingles
+  (filler words dropped, negations kept), so rephrasings like
+  "How do I stop procrastinating?" / "how can i stop procrastinating"
+  reuse the same answer, while "iphone vs samsung" / "pixel vs samsung"
+  stay far apart
+- A near hit also needs the same anchors (numbers, named entities):
+  "...company 694..." never reuses the answer for "...company 313..."
+- Per-mode switch: excluded modes are never cached,
+  exact-only modes skip the near-duplicate lookup
+- Hit / near-hit / miss / eviction / memory stats
+"""
+
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.config import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_SIMHASH_DISTANCE,
+    RESPONSE_CACHE_MIN_NEAR_TOKENS,
+    RESPONSE_CACHE_EXCLUDED_MODES,
+    RESPONSE_CACHE_EXACT_ONLY_MODES
+)
+
+SIMHASH_BITS = 64
+WORD = re.compile(r"\w+", re.UNICODE)
+
+# filler words that don't change what is being asked
+# ("not", "no", "never" deliberately absent)
+STOPWORDS = frozenset("""
+a about am an and are as at be been can could do does did for from how
+i im is it just me my of on or our please really should so that the
+this to very want was we what when which why will with would you your
+now
+""".split())
+
+
+# ----------------------------------------
+# NORMALIZATION + SIMHASH
+# ----------------------------------------
+def tokenize(question: str) -> List[str]:
+    return WORD.findall(question.lower())
+
+
+def normalize_question(question: str) -> str:
+    """
+    Case, punctuation and extra spaces don't change the key
+    """
+    return " ".join(tokenize(question))
+
+
+def anchors(question: str) -> frozenset:
+    """
+    Words a near-duplicate must repeat exactly: anything with a digit,
+    and capitalised words that don't start a sentence (names, brands)
+    """
+    found = set()
+    sentence_start = True
+    for raw in question.split():
+        words = WORD.findall(raw)
+        for word in words:
+            lowered = word.lower()
+            if any(ch.isdigit() for ch in word):
+                found.add(lowered)
+            elif not word.islower() and not sentence_start and lowered not in STOPWORDS:
+                found.add(lowered)
+            sentence_start = False
+        if raw[-1:] in ".?!":
+            sentence_start = True
+    return frozenset(found)
+
+
+def content_tokens(tokens: List[str]) -> List[str]:
+    return [token for token in tokens if token not in STOPWORDS]
+
+
+def shingles(tokens: List[str], size: int = 2) -> List[str]:
+    """
+    Single words + word n-grams (n = size)
+    """
+    grams = [
+        " ".join(tokens[i:i + size])
+        for i in range(len(tokens) - size + 1)
+    ]
+    return list(tokens) + grams
+
+
+def _feature_hash(feature: str) -> int:
+    digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def simhash(features: Iterable[str]) -> int:
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+# ----------------------------------------
+# CACHE
+# ----------------------------------------
+class ResponseCache:
+    """
+    Values are stored as JSON text: the size is known for the
+    memory cap, and every hit returns a fresh copy.
+
+    Near-duplicate index splits each SimHash into (max_distance + 1)
+    bands; two hashes within max_distance bits share at least one
+    band exactly, so only that bucket is compared.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        max_distance: int = 3,
+        min_near_tokens: int = 2,
+        excluded_modes: Iterable[str] = (),
+        exact_only_modes: Iterable[str] = ()
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.min_near_tokens = min_near_tokens
+        self.excluded_modes = set(excluded_modes)
+        self.exact_only_modes = set(exact_only_modes)
+
+        # (mode, normalized) -> (json text, simhash or None, expires_at,
+        #                       size, original question, anchors)
+        self._data: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._bands: Dict[tuple, set] = {}
+        self.bytes = 0
+
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.skipped = 0
+
+    # -------------------------
+    # POLICY
+    # -------------------------
+    def cacheable(self, mode: str) -> bool:
+        return mode not in self.excluded_modes
+
+    def _fingerprint(self, mode: str, tokens: List[str]) -> Optional[int]:
+        """
+        None -> near-duplicate lookup off for this question
+        """
+        if self.max_distance <= 0 or mode in self.exact_only_modes:
+            return None
+        words = content_tokens(tokens)
+        if len(words) < self.min_near_tokens:
+            return None
+        return simhash(shingles(words))
+
+    # -------------------------
+    # BAND INDEX
+    # -------------------------
+    def _band_keys(self, mode: str, fingerprint: int):
+        mask = (1 << self.band_bits) - 1
+        for band in range(self.bands):
+            yield (mode, band, fingerprint >> (band * self.band_bits) & mask)
+
+    def _index(self, key: Tuple[str, str], fingerprint: Optional[int]):
+        if fingerprint is None:
+            return
+        for band_key in self._band_keys(key[0], fingerprint):
+            self._bands.setdefault(band_key, set()).add(key)
+
+    def _unindex(self, key: Tuple[str, str], fingerprint: Optional[int]):
+        if fingerprint is None:
+            return
+        for band_key in self._band_keys(key[0], fingerprint):
+            bucket = self._bands.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band_key]
+
+    def _remove(self, key: Tuple[str, str]):
+        _, fingerprint, _, size, _, _ = self._data.pop(key)
+        self._unindex(key, fingerprint)
+        self.bytes -= size
+
+    # -------------------------
+    # LOOKUP
+    # -------------------------
+    def _live(self, key: Tuple[str, str], now: float) -> Optional[tuple]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= now:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, mode: str, question: str) -> Optional[Tuple[dict, str]]:
+        """
+        Returns (response, question it was cached for) or None.
+        That question can differ from the asked one (case, near hit).
+        """
+        if not self.cacheable(mode):
+            self.skipped += 1
+            return None
+
+        now = time.monotonic()
+        tokens = tokenize(question)
+        key = (mode, " ".join(tokens))
+
+        entry = self._live(key, now)
+        if entry is not None:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return json.loads(entry[0]), entry[4]
+
+        fingerprint = self._fingerprint(mode, tokens)
+        if fingerprint is not None:
+            best, best_distance = None, self.max_distance + 1
+            wanted = anchors(question)
+
+            candidates = set()
+            for band_key in self._band_keys(mode, fingerprint):
+                candidates |= self._bands.get(band_key, set())
+
+            for candidate in candidates:
+                candidate_entry = self._live(candidate, now)
+                if candidate_entry is None or candidate_entry[5] != wanted:
+                    continue
+                distance = hamming(fingerprint, candidate_entry[1])
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+
+            if best is not None:
+                self._data.move_to_end(best)
+                self.near_hits += 1
+                entry = self._data[best]
+                return json.loads(entry[0]), entry[4]
+
+        self.misses += 1
+        return None
+
+    # -------------------------
+    # STORE
+    # -------------------------
+    def set(self, mode: str, question: str, response: dict):
+        if not self.cacheable(mode) or self.ttl_seconds <= 0:
+            return
+
+        tokens = tokenize(question)
+        key = (mode, " ".join(tokens))
+        text = json.dumps(response, default=str)
+        size = len(text) + len(key[1])
+        if size > self.max_bytes:
+            return
+
+        fingerprint = self._fingerprint(mode, tokens)
+
+        if key in self._data:
+            self._remove(key)
+
+        self._data[key] = (
+            text,
+            fingerprint,
+            time.monotonic() + self.ttl_seconds,
+            size,
+            question,
+            anchors(question)
+        )
+        self._index(key, fingerprint)
+        self.bytes += size
+
+        while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+        self._bands.clear()
+        self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (
+                round((self.hits + self.near_hits) / lookups, 4)
+                if lookups else 0.0
+            ),
+            "excluded_modes": sorted(self.excluded_modes)
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+    max_distance=RESPONSE_CACHE_SIMHASH_DISTANCE,
+    min_near_tokens=RESPONSE_CACHE_MIN_NEAR_TOKENS,
+    excluded_modes=RESPONSE_CACHE_EXCLUDED_MODES,
+    exact_only_modes=RESPONSE_CACHE_EXACT_ONLY_MODES
+)
+
+
+def response_cache_stats() -> dict:
+    return {"enabled": RESPONSE_CACHE_ENABLED, **response_cache.stats()}
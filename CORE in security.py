@@ -13,26 +13,68 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from bson import ObjectId
 
 from core.config import (
     JWT_SECRET_KEY,
     JWT_ALGORITHM,
-    JWT_EXPIRE_MINUTES
+    JWT_EXPIRE_MINUTES,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_QUEUE_TIMEOUT_MS
 )
 from db.mongo import users
+from core.identity_cache import (
+    USER_PROJECTION,
+    get_cached_claims,
+    cache_claims,
+    get_cached_user,
+    cache_user
+)
+from utils.executor import BoundedExecutor
+from core.plan_guard import effective_plan
 
 # ----------------------------------------
 # PASSWORD HASHING
 # ----------------------------------------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib + bcrypt load on first hash / verify, so workers that
+# only serve token-authenticated routes never import them
+_pwd_context = None
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+# bcrypt is CPU-bound: run it on a small dedicated pool so
+# login bursts don't stall the event loop
+password_executor = BoundedExecutor(
+    name="password-hash",
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    queue_timeout_ms=PASSWORD_HASH_QUEUE_TIMEOUT_MS
+)
+
+async def hash_password_async(password: str) -> str:
+    return await password_executor.run(hash_password, password)
+
+async def verify_password_async(
+    plain_password: str,
+    hashed_password: str
+) -> bool:
+    return await password_executor.run(
+        verify_password, plain_password, hashed_password
+    )
 
 
 # ----------------------------------------
@@ -73,28 +115,41 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(
-            token,
-            JWT_SECRET_KEY,
-            algorithms=[JWT_ALGORITHM]
-        )
+    payload = get_cached_claims(token)
 
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token,
+                JWT_SECRET_KEY,
+                algorithms=[JWT_ALGORITHM]
+            )
+        except JWTError:
             raise credentials_exception
 
-    except JWTError:
-        raise credentials_exception
+        cache_claims(token, payload)
 
-    user = await users.find_one({"_id": ObjectId(user_id)})
-    if not user:
+    user_id: str = payload.get("sub")
+    if user_id is None:
         raise credentials_exception
 
+    user = get_cached_user(user_id)
+
+    if user is None:
+        user = await users.find_one(
+            {"_id": ObjectId(user_id)},
+            USER_PROJECTION
+        )
+        if not user:
+            raise credentials_exception
+
+        cache_user(user_id, user)
+
     return {
-        "user_id": str(user["_id"]),
+        "user_id": user_id,
         "email": user.get("email"),
         "plan": user.get("plan", "free"),
+        "plan_expiry": user.get("plan_expiry"),
         "is_active": True
     }
 
@@ -103,7 +158,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
 # REQUIRE PAID PLAN (OPTIONAL DEPENDENCY)
 # ----------------------------------------
 def require_paid_plan(current=Depends(get_current_user)):
-    if current.get("plan") == "free":
+    plan = effective_plan(current.get("plan", "free"), current.get("plan_expiry"))
+    if plan == "free":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Upgrade plan to access this feature"
@@ -12,8 +12,8 @@ from datetime import datetime
 from db.mongo import users
 from db.models import UserCreate, TokenResponse
 from core.security import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token
 )
 
@@ -33,9 +33,11 @@ async def signup(data: UserCreate):
         )
 
     # create user
+    hashed = await hash_password_async(data.password)
+
     user_doc = {
         "email": data.email,
-        "password": hash_password(data.password),
+        "password": hashed,
         "plan": "free",
         "payment_status": "free",
         "created_at": datetime.utcnow(),
@@ -66,7 +68,7 @@ async def login(data: UserCreate):
             detail="Invalid email or password"
         )
 
-    if not verify_password(data.password, user["password"]):
+    if not await verify_password_async(data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -8,14 +8,27 @@ Brain Routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import AsyncExitStack
 from datetime import datetime
+import asyncio
+import json
 
 from core.security import get_current_user
-from core.plan_guard import check_plan_access
-from core.brain_engine import run_brain_engine
+from core.plan_guard import check_plan_access, effective_plan
+from core.brain_engine import (
+    run_brain_engine_async,
+    stream_brain_engine,
+    pack_response
+)
+from core.brain_scheduler import schedule_brain_work, brain_slot
+from core.config import BRAIN_BATCH_MAX_ITEMS
+from core.history_lifecycle import retention_fields
+from utils.limiter import check_daily_limit, refund_daily_limit
 
-from db.mongo import history
-from db.models import BrainQuestion
+from db.history_writer import save_history, save_history_many
+from db.models import BrainQuestion, BrainBatchRequest
 
 router = APIRouter()
 
@@ -34,7 +47,10 @@ async def ask_brain(
     """
 
     user_id = current_user["user_id"]
-    user_plan = current_user["plan"]
+    user_plan = effective_plan(
+        current_user["plan"],
+        current_user.get("plan_expiry")
+    )
     mode = data.mode
 
     # -----------------------------
@@ -43,14 +59,27 @@ async def ask_brain(
     check_plan_access(user_plan, mode)
 
     # -----------------------------
-    # RUN BRAIN ENGINE
+    # DAILY QUOTA (FREE PLAN)
+    # -----------------------------
+    await check_daily_limit(user_id, user_plan)
+
     # -----------------------------
+    # RUN BRAIN ENGINE (PLAN-WEIGHTED QUEUE)
+    # -----------------------------
+    # shed (503) / provider (502, 504) / engine errors: no answer,
+    # so the question doesn't count against the daily limit
     try:
-        response = run_brain_engine(
+        response = await schedule_brain_work(
+            user_plan,
+            run_brain_engine_async,
             question=data.question,
             mode=mode
         )
+    except HTTPException:
+        await refund_daily_limit(user_id, user_plan)
+        raise
     except Exception as e:
+        await refund_daily_limit(user_id, user_plan)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -59,19 +88,272 @@ async def ask_brain(
     # -----------------------------
     # SAVE HISTORY
     # -----------------------------
+    created_at = datetime.utcnow()
     history_doc = {
         "user_id": user_id,
         "question": data.question,
         "mode": mode,
-        "response": response,
-        "created_at": datetime.utcnow()
+        # template id + variable params, not the full response
+        **pack_response(data.question, response),
+        "created_at": created_at,
+        **retention_fields(user_plan, created_at)
     }
 
-    await history.insert_one(history_doc)
+    await save_history(history_doc)
 
     return {
         "question": data.question,
         "mode": mode,
         "response": response,
         "timestamp": history_doc["created_at"]
-    }
\ No newline at end of file
+    }
+
+
+# ----------------------------------------
+# ASK BRAIN (STREAMING, NDJSON)
+# ----------------------------------------
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event, default=str) + "\n").encode()
+
+
+async def _save_streamed_history(history_doc: dict):
+    # only complete answers go into history
+    response = history_doc.pop("response", None)
+    if response is not None:
+        history_doc.update(pack_response(history_doc["question"], response))
+        await save_history(history_doc)
+
+
+@router.post("/ask/stream")
+async def ask_brain_stream(
+    data: BrainQuestion,
+    current_user=Depends(get_current_user)
+):
+    """
+    Same as /ask but streams one JSON line per event:
+    - {"event": "start", ...}
+    - {"event": "section", "section": ..., "value": ...}
+    - {"event": "done", "timestamp": ...} or {"event": "error", ...}
+    History is saved after the stream closes.
+    The brain slot is taken before the response starts (busy -> 503)
+    and freed once the engine is done, not when the client has read it.
+    """
+
+    user_id = current_user["user_id"]
+    user_plan = effective_plan(
+        current_user["plan"],
+        current_user.get("plan_expiry")
+    )
+    mode = data.mode
+
+    # checks happen before streaming so they stay normal HTTP errors
+    check_plan_access(user_plan, mode)
+    await check_daily_limit(user_id, user_plan)
+
+    created_at = datetime.utcnow()
+    history_doc = {
+        "user_id": user_id,
+        "question": data.question,
+        "mode": mode,
+        "response": None,
+        "created_at": created_at,
+        **retention_fields(user_plan, created_at)
+    }
+
+    # checked out before streaming: a busy scheduler is a real 503
+    slot = AsyncExitStack()
+    try:
+        await slot.enter_async_context(brain_slot(user_plan))
+    except HTTPException:
+        await refund_daily_limit(user_id, user_plan)
+        raise
+
+    produced = asyncio.Queue()
+
+    async def produce():
+        # engine output is buffered, so a slow client never holds the slot
+        try:
+            async for section, value in stream_brain_engine(
+                question=data.question,
+                mode=mode
+            ):
+                produced.put_nowait({
+                    "event": "section",
+                    "section": section,
+                    "value": value
+                })
+            produced.put_nowait({"event": "done", "timestamp": created_at})
+        except HTTPException as e:
+            produced.put_nowait({"event": "error", "detail": e.detail})
+            await refund_daily_limit(user_id, user_plan)
+        except Exception as e:
+            produced.put_nowait({"event": "error", "detail": str(e)})
+            await refund_daily_limit(user_id, user_plan)
+        finally:
+            await slot.aclose()
+
+    producer = asyncio.create_task(produce())
+
+    async def events():
+        response = {}
+        try:
+            yield _ndjson({
+                "event": "start",
+                "question": data.question,
+                "mode": mode
+            })
+
+            while True:
+                event = await produced.get()
+                if event["event"] == "section":
+                    response[event["section"]] = event["value"]
+                elif event["event"] == "done":
+                    history_doc["response"] = response
+                yield _ndjson(event)
+                if event["event"] != "section":
+                    return
+        finally:
+            # client went away mid-answer: stop the engine, free the slot
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            await slot.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(_save_streamed_history, history_doc)
+    )
+
+
+# ----------------------------------------
+# ASK BRAIN (BATCH)
+# ----------------------------------------
+@router.post("/ask/batch")
+async def ask_brain_batch(
+    data: BrainBatchRequest,
+    current_user=Depends(get_current_user)
+):
+    """
+    Many questions in one call:
+    - Auth + plan check once per distinct mode
+    - History through the writer (queued, or one insert_many)
+    - Failed items reported (and their quota given back),
+      rest still answered
+    """
+
+    if not data.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No questions in batch"
+        )
+
+    if len(data.items) > BRAIN_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch limit is {BRAIN_BATCH_MAX_ITEMS} questions"
+        )
+
+    user_id = current_user["user_id"]
+    user_plan = effective_plan(
+        current_user["plan"],
+        current_user.get("plan_expiry")
+    )
+
+    # -----------------------------
+    # PLAN ACCESS CHECK (PER MODE)
+    # -----------------------------
+    mode_errors = {}
+    for mode in {item.mode for item in data.items}:
+        try:
+            check_plan_access(user_plan, mode)
+        except HTTPException as e:
+            mode_errors[mode] = e.detail
+
+    # -----------------------------
+    # DAILY QUOTA (WHOLE BATCH, FAILURES REFUNDED BELOW)
+    # -----------------------------
+    allowed_count = sum(
+        1 for item in data.items if item.mode not in mode_errors
+    )
+    if allowed_count:
+        await check_daily_limit(user_id, user_plan, amount=allowed_count)
+
+    # -----------------------------
+    # RUN BRAIN ENGINE
+    # -----------------------------
+    created_at = datetime.utcnow()
+    results = []
+    history_docs = []
+
+    # items run concurrently, each one a job in the user's tier
+    answers = await asyncio.gather(
+        *(
+            schedule_brain_work(
+                user_plan,
+                run_brain_engine_async,
+                question=item.question,
+                mode=item.mode
+            )
+            for item in data.items
+            if item.mode not in mode_errors
+        ),
+        return_exceptions=True
+    )
+    answers = iter(answers)
+
+    for index, item in enumerate(data.items):
+        if item.mode in mode_errors:
+            results.append({
+                "index": index,
+                "question": item.question,
+                "mode": item.mode,
+                "error": mode_errors[item.mode]
+            })
+            continue
+
+        response = next(answers)
+        if isinstance(response, Exception):
+            results.append({
+                "index": index,
+                "question": item.question,
+                "mode": item.mode,
+                "error": (
+                    response.detail
+                    if isinstance(response, HTTPException)
+                    else str(response)
+                )
+            })
+            continue
+
+        history_docs.append({
+            "user_id": user_id,
+            "question": item.question,
+            "mode": item.mode,
+            **pack_response(item.question, response),
+            "created_at": created_at,
+            **retention_fields(user_plan, created_at)
+        })
+        results.append({
+            "index": index,
+            "question": item.question,
+            "mode": item.mode,
+            "response": response,
+            "timestamp": created_at
+        })
+
+    # only answered questions count against the daily limit
+    unanswered = allowed_count - len(history_docs)
+    if unanswered:
+        await refund_daily_limit(user_id, user_plan, amount=unanswered)
+
+    # -----------------------------
+    # SAVE HISTORY (WRITER: QUEUED OR ONE ROUND TRIP)
+    # -----------------------------
+    await save_history_many(history_docs)
+
+    return {
+        "count": len(results),
+        "succeeded": len(history_docs),
+        "failed": len(results) - len(history_docs),
+        "results": results
+    }
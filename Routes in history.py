@@ -1,15 +1,36 @@
 """
 History Routes
 --------------
-- Get user's question-answer history
+- Get user's question-answer history (hot + archived tiers)
+- Search history (text index)
+- Export history (streaming NDJSON / CSV)
 - Clear history (optional)
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
+from datetime import datetime, timezone
+from typing import Optional
+import csv
+import io
+import json
 
 from core.security import get_current_user
+from core.brain_engine import expand_search, unpack_response
+from core.config import HISTORY_EXPORT_BATCH_SIZE, HISTORY_EXPORT_CHUNK_BYTES
+from core.history_archive import archived_until, read_history, iter_archived
+from core.history_lifecycle import start_history_clear, get_job
 from db.mongo import history
+from utils.pagination import (
+    NEWEST_FIRST,
+    BEST_MATCH_FIRST,
+    after_cursor_query,
+    after_score_cursor_query,
+    decode_cursor,
+    encode_cursor,
+    next_cursor
+)
 
 router = APIRouter()
 
@@ -20,57 +41,285 @@ router = APIRouter()
 async def get_history(
     limit: int = 20,
     skip: int = 0,
+    after: Optional[str] = None,
     current_user=Depends(get_current_user)
 ):
     """
     Returns user's question history
     Params:
     - limit: number of records
-    - skip: pagination offset
+    - skip: pagination offset (legacy)
+    - after: next_cursor from previous page
     """
 
-    user_id = current_user["user_id"]
-
-    cursor = (
-        history
-        .find({"user_id": user_id})
-        .sort("created_at", -1)
-        .skip(skip)
-        .limit(limit)
-    )
+    page = await read_history(current_user["user_id"], limit, skip, after)
 
     records = []
-    async for item in cursor:
+    last = None
+    for item in page:
+        last = item
         records.append({
             "id": str(item["_id"]),
             "question": item.get("question"),
             "mode": item.get("mode"),
-            "response": item.get("response"),
+            "response": unpack_response(item),
             "created_at": item.get("created_at")
         })
 
     return {
         "count": len(records),
+        "next_cursor": next_cursor(last, len(records), limit),
         "items": records
     }
 
 
+# ----------------------------------------
+# SEARCH USER HISTORY
+# ----------------------------------------
+SEARCH_MAX_LIMIT = 50
+
+
+@router.get("/search")
+async def search_history(
+    q: str,
+    mode: Optional[str] = None,
+    limit: int = 20,
+    after: Optional[str] = None,
+    current_user=Depends(get_current_user)
+):
+    """
+    Full-text search over question + answer text.
+    Template wording isn't stored per document: words / phrases from
+    a template match every answer built from it.
+    Params:
+    - q: words / "exact phrase" / -exclude
+    - mode: only this brain mode
+    - after: next_cursor from previous page
+    Best match first, newer first on equal score.
+    Only the hot tier is searched: archived entries (older than
+    HISTORY_ARCHIVE_AFTER_DAYS) don't match. "archive_searched" is
+    false and "unsearched_until" is the newest archived entry's
+    created_at when the user has any.
+    """
+
+    if not q.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query is empty"
+        )
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    search, excluded = expand_search(q)
+
+    # user_id equality is the text index prefix
+    match = {
+        "user_id": current_user["user_id"],
+        "$text": {"$search": search}
+    }
+    if mode:
+        match["mode"] = mode
+    if excluded:
+        # -word that only exists in template wording
+        match["template"] = {"$nin": excluded}
+        match["response.type"] = {
+            "$nin": [template_id.split("@")[0] for template_id in excluded]
+        }
+
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}}
+    ]
+    if after:
+        pipeline.append({"$match": after_score_cursor_query({}, after)})
+    pipeline += [
+        {"$sort": dict(BEST_MATCH_FIRST)},
+        {"$limit": limit},
+        {"$project": {"search_text": 0}}
+    ]
+
+    records = []
+    last = None
+    async for item in history.aggregate(pipeline):
+        last = item
+        records.append({
+            "id": str(item["_id"]),
+            "question": item.get("question"),
+            "mode": item.get("mode"),
+            "response": unpack_response(item),
+            "created_at": item.get("created_at"),
+            "score": round(item["score"], 4)
+        })
+
+    return {
+        "count": len(records),
+        "next_cursor": next_cursor(last, len(records), limit, with_score=True),
+        "items": records,
+        "archive_searched": False,
+        "unsearched_until": await archived_until(current_user["user_id"])
+    }
+
+
+# ----------------------------------------
+# EXPORT USER HISTORY (STREAMING)
+# ----------------------------------------
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+EXPORT_COLUMNS = ["id", "created_at", "mode", "question", "response", "cursor"]
+EXPORT_PROJECTION = {
+    "question": 1,
+    "mode": 1,
+    "created_at": 1,
+    "template": 1,
+    "params": 1,
+    "response": 1
+}
+
+
+def _as_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at is stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _export_record(item: dict) -> dict:
+    return {
+        "id": str(item["_id"]),
+        "created_at": item["created_at"].isoformat(),
+        "mode": item.get("mode"),
+        "question": item.get("question"),
+        "response": unpack_response(item),
+        # pass as ?after= to resume after this record
+        "cursor": encode_cursor(item)
+    }
+
+
+def _csv_line(values: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+@router.get("/export")
+async def export_history(
+    format: str = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None,
+    current_user=Depends(get_current_user)
+):
+    """
+    Streams the whole history, newest first, in constant memory
+    Params:
+    - format: ndjson / csv
+    - since / until: created_at range (until is exclusive)
+    - after: "cursor" of the last record received (resume)
+    """
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be ndjson or csv"
+        )
+
+    query = {"user_id": current_user["user_id"]}
+
+    created_at = {}
+    if since:
+        created_at["$gte"] = _as_utc_naive(since)
+    if until:
+        created_at["$lt"] = _as_utc_naive(until)
+    if created_at:
+        query["created_at"] = created_at
+
+    before = None
+    if after:
+        before = decode_cursor(after)
+        query = after_cursor_query(query, after)
+
+    cursor = (
+        history
+        .find(query, EXPORT_PROJECTION)
+        .sort(NEWEST_FIRST)
+        .batch_size(HISTORY_EXPORT_BATCH_SIZE)
+    )
+
+    async def items():
+        # hot tier first, then the (older) archived months
+        async for item in cursor:
+            yield item
+        async for item in iter_archived(
+            current_user["user_id"],
+            before=before,
+            since=created_at.get("$gte"),
+            until=created_at.get("$lt")
+        ):
+            yield item
+
+    async def rows():
+        # header only on a fresh export, not on resume
+        chunk = [] if format == "ndjson" or after else [_csv_line(EXPORT_COLUMNS)]
+        size = sum(len(part) for part in chunk)
+
+        try:
+            async for item in items():
+                record = _export_record(item)
+                if format == "ndjson":
+                    line = json.dumps(record, default=str, ensure_ascii=False) + "\n"
+                else:
+                    record["response"] = json.dumps(
+                        record["response"], default=str, ensure_ascii=False
+                    )
+                    line = _csv_line([record[c] for c in EXPORT_COLUMNS])
+
+                chunk.append(line)
+                size += len(line)
+                if size >= HISTORY_EXPORT_CHUNK_BYTES:
+                    yield "".join(chunk).encode()
+                    chunk, size = [], 0
+
+            if chunk:
+                yield "".join(chunk).encode()
+        finally:
+            # client went away: free the server-side cursor now
+            await cursor.close()
+
+    filename = f"blackbrain-history.{format}"
+    return StreamingResponse(
+        rows(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 # ----------------------------------------
 # CLEAR USER HISTORY
 # ----------------------------------------
-@router.delete("/clear")
+@router.delete("/clear", status_code=status.HTTP_202_ACCEPTED)
 async def clear_history(
     current_user=Depends(get_current_user)
 ):
     """
-    Deletes all history for current user
+    Starts a background clear of current user's history.
+    Poll /history/jobs/{job_id} for progress.
     """
 
-    user_id = current_user["user_id"]
-
-    result = await history.delete_many({"user_id": user_id})
+    job = await start_history_clear(current_user["user_id"])
 
     return {
-        "message": "History cleared successfully",
-        "deleted_count": result.deleted_count
-    }
\ No newline at end of file
+        "message": "History clear started",
+        **job
+    }
+
+
+# ----------------------------------------
+# BACKGROUND JOB STATUS
+# ----------------------------------------
+@router.get("/jobs/{job_id}")
+async def history_job_status(
+    job_id: str,
+    current_user=Depends(get_current_user)
+):
+    return await get_job(job_id, current_user["user_id"])
\ No newline at end of file
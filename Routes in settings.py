@@ -5,9 +5,14 @@ History Routes
 - Clear complete history
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
+from typing import Optional
+
 from core.security import get_current_user
-from db.mongo import history
+from core.brain_engine import unpack_response
+from core.history_archive import read_history
+from core.history_lifecycle import start_history_clear
+from utils.pagination import next_cursor
 
 router = APIRouter()
 
@@ -18,34 +23,31 @@ router = APIRouter()
 async def get_history(
     limit: int = 20,
     skip: int = 0,
+    after: Optional[str] = None,
     current_user=Depends(get_current_user)
 ):
     """
     Fetch logged-in user's question history
+    (pass "after" = next_cursor for keyset paging)
     """
 
-    user_id = current_user["user_id"]
-
-    cursor = (
-        history
-        .find({"user_id": user_id})
-        .sort("created_at", -1)
-        .skip(skip)
-        .limit(limit)
-    )
+    page = await read_history(current_user["user_id"], limit, skip, after)
 
     items = []
-    async for record in cursor:
+    last = None
+    for record in page:
+        last = record
         items.append({
             "id": str(record["_id"]),
             "question": record.get("question"),
             "mode": record.get("mode"),
-            "response": record.get("response"),
+            "response": unpack_response(record),
             "created_at": record.get("created_at")
         })
 
     return {
         "total": len(items),
+        "next_cursor": next_cursor(last, len(items), limit),
         "history": items
     }
 
@@ -53,19 +55,17 @@ async def get_history(
 # ----------------------------------------
 # CLEAR USER HISTORY
 # ----------------------------------------
-@router.delete("/clear")
+@router.delete("/clear", status_code=status.HTTP_202_ACCEPTED)
 async def clear_history(
     current_user=Depends(get_current_user)
 ):
     """
-    Delete all history of logged-in user
+    Delete all history of logged-in user (background job)
     """
 
-    user_id = current_user["user_id"]
-
-    result = await history.delete_many({"user_id": user_id})
+    job = await start_history_clear(current_user["user_id"])
 
     return {
-        "message": "History cleared successfully",
-        "deleted_count": result.deleted_count
+        "message": "History clear started",
+        **job
     }
\ No newline at end of file
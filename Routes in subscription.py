@@ -3,17 +3,22 @@ Subscription Routes
 -------------------
 - Create Razorpay order
 - Verify payment & activate plan
+- Gateway webhook (signed, idempotent, applied in background)
 - Get current subscription status
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from datetime import datetime
+from bson import ObjectId
+import json
 
 from core.security import get_current_user
 from core.payment import (
     create_payment_order,
     verify_and_activate_payment
 )
+from core.payment_gateway import valid_webhook_signature
+from core.payment_webhook import event_id_for, record_event, schedule_event
 from core.config import SUBSCRIPTION_PLANS
 from db.mongo import users
 from db.models import CreateOrderRequest, VerifyPaymentRequest
@@ -53,7 +58,7 @@ async def create_order(
     user_id = current_user["user_id"]
     plan_code = data.plan_code
 
-    order = create_payment_order(plan_code, user_id)
+    order = await create_payment_order(plan_code, user_id)
     return order
 
 
@@ -81,6 +86,42 @@ async def verify_payment(
     return result
 
 
+# ----------------------------------------
+# GATEWAY WEBHOOK
+# ----------------------------------------
+@router.post("/webhook")
+async def payment_webhook(request: Request):
+    """
+    Razorpay webhook: verify, record once, ack.
+    The plan change itself runs in the background.
+    """
+    body = await request.body()
+
+    if not valid_webhook_signature(body, request.headers.get("X-Razorpay-Signature")):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature"
+        )
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook payload"
+        )
+
+    event_id = event_id_for(body, request.headers.get("X-Razorpay-Event-Id"))
+    if not await record_event(event_id, payload):
+        # redelivery: retry it if it still isn't applied
+        # (process_event skips processed / in-flight events)
+        schedule_event(event_id)
+        return {"status": "duplicate", "event_id": event_id}
+
+    schedule_event(event_id)
+    return {"status": "accepted", "event_id": event_id}
+
+
 # ----------------------------------------
 # GET CURRENT SUBSCRIPTION STATUS
 # ----------------------------------------
@@ -91,7 +132,7 @@ async def subscription_status(
     """
     Returns user's current plan & validity
     """
-    user = await users.find_one({"_id": current_user["user_id"]})
+    user = await users.find_one({"_id": ObjectId(current_user["user_id"])})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
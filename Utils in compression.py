@@ -0,0 +1,207 @@
+"""
+Compression Utility
+-------------------
+- CompressionMiddleware: gzip / brotli for complete responses
+  (size threshold + content-type allowlist, streaming left alone)
+- PrecompressedStaticFiles: serves pre-built .br / .gz siblings
+  and long-lived immutable Cache-Control for content-hashed names
+- Brotli is optional: without the "brotli" package only gzip is used
+"""
+
+import gzip
+import mimetypes
+import re
+import stat
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/",
+)
+
+# app.3f9a1c2b.js / main.3f9a1c2b7d.css (8+ hex chars before extension)
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "public, max-age=0, must-revalidate"
+
+
+# ----------------------------------------
+# ACCEPT-ENCODING
+# ----------------------------------------
+def accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token)
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+
+def _add_vary(headers: MutableHeaders):
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+
+
+# ----------------------------------------
+# RESPONSE COMPRESSION (PURE ASGI)
+# ----------------------------------------
+class CompressionMiddleware:
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        content_types: tuple = DEFAULT_CONTENT_TYPES,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "")
+
+            skip = (
+                # streaming (NDJSON, files): keep chunks flowing
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not content_type.startswith(self.content_types)
+            )
+            if skip:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = self._compress(encoding, body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            _add_vary(headers)
+
+            await send(start_message)
+            await send({
+                "type": "http.response.body",
+                "body": compressed,
+                "more_body": False
+            })
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# ----------------------------------------
+# STATIC FILES (PRECOMPRESSED + CACHE HEADERS)
+# ----------------------------------------
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Build step (scripts/build_static.py) writes app.<hash>.js plus
+    app.<hash>.js.br / .gz; this serves the best sibling.
+    """
+
+    SIBLINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    async def get_response(self, path: str, scope):
+        response = None
+        accepted = accepted_encodings(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+
+        if scope["method"] in ("GET", "HEAD"):
+            for encoding, suffix in self.SIBLINGS:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + suffix
+                )
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    media_type = mimetypes.guess_type(path)[0] or "text/plain"
+                    response = FileResponse(
+                        full_path,
+                        stat_result=stat_result,
+                        media_type=media_type
+                    )
+                    response.headers["Content-Encoding"] = encoding
+                    if self.is_not_modified(response.headers, Headers(scope=scope)):
+                        response = NotModifiedResponse(response.headers)
+                    break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            _add_vary(response.headers)
+            response.headers["Cache-Control"] = (
+                IMMUTABLE_CACHE if HASHED_NAME.search(path) else REVALIDATE_CACHE
+            )
+        return response
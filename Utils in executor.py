@@ -0,0 +1,143 @@
+"""
+Bounded Executor Utility
+------------------------
+- Runs blocking (CPU / sync SDK) calls off the event loop
+- Caps concurrent calls, bounds the waiting queue
+- Queue wait timeout -> 503 instead of piling up
+- Queue-wait and run-time metrics
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from fastapi import HTTPException, status
+
+
+# ----------------------------------------
+# TIMING STATS
+# ----------------------------------------
+class Timing:
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3)
+        }
+
+
+# ----------------------------------------
+# BOUNDED EXECUTOR
+# ----------------------------------------
+class BoundedExecutor:
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_pending: int,
+        queue_timeout_ms: int
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout_ms / 1000
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=name
+        )
+        self._slots = None
+        self.pending = 0
+        self.active = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+        self.queue_wait = Timing()
+        self.run_time = Timing()
+
+    def _busy(self, detail: str):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"}
+        )
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        timeout: Optional[float] = None
+    ):
+        """
+        Awaits fn(*args) on the pool.
+        timeout (seconds) bounds the call itself; the thread keeps
+        running to completion but the caller is released.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise self._busy(f"{self.name} is busy, try again")
+
+        queued_at = time.perf_counter()
+        self.pending += 1
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(),
+                timeout=self.queue_timeout
+            )
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise self._busy(f"{self.name} is busy, try again")
+        finally:
+            self.pending -= 1
+
+        self.queue_wait.add((time.perf_counter() - queued_at) * 1000)
+
+        started = time.perf_counter()
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._pool, fn, *args)
+            if timeout is None:
+                return await future
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=f"{self.name} timed out"
+            )
+        finally:
+            self.active -= 1
+            self._slots.release()
+            self.run_time.add((time.perf_counter() - started) * 1000)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "active": self.active,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "queue_wait": self.queue_wait.stats(),
+            "run_time": self.run_time.stats()
+        }
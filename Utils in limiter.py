@@ -3,50 +3,217 @@ Limiter Utility
 ---------------
 - Free plan users ke liye daily question limit
 - Plan-based usage control
+- Per-user per-day counter documents (one atomic $inc per check)
+- Old counters TTL index se apne aap delete hote hain
+- In-memory backend tests ke liye (QUOTA_BACKEND=memory)
 """
 
 from datetime import datetime, timedelta
+from typing import Optional
+
 from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from db.mongo import usage_counters
+from core.config import SUBSCRIPTION_PLANS, QUOTA_BACKEND
+
+# counters are kept one extra day, then TTL index removes them
+COUNTER_RETENTION = timedelta(days=2)
+
+
+# ----------------------------------------
+# HELPERS
+# ----------------------------------------
+def daily_limit_for_plan(user_plan: str) -> Optional[int]:
+    """
+    None -> unlimited (paid plans)
+    """
+    plan = SUBSCRIPTION_PLANS.get(user_plan)
+    if plan is None:
+        plan = SUBSCRIPTION_PLANS["free"]
+    return plan.get("daily_limit")
+
+
+def _today_start() -> datetime:
+    return datetime.utcnow().replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def _counter_key(user_id: str, day: datetime) -> str:
+    return f"{user_id}:{day.strftime('%Y-%m-%d')}"
+
+
+# ----------------------------------------
+# MONGO BACKEND
+# ----------------------------------------
+class MongoQuotaBackend:
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def consume(
+        self,
+        user_id: str,
+        limit: int,
+        amount: int = 1
+    ) -> bool:
+        """
+        Increments today's counter only if it stays within limit.
+        The filter misses when the counter is full, but also when two
+        first-of-day requests race to create it: either way the upsert
+        collides on _id. The retry drops the limit predicate and reads
+        the count back; over the limit -> undo and "no".
+        """
+        if amount > limit:
+            return False
+
+        day = _today_start()
+        key = _counter_key(user_id, day)
+        update = {
+            "$inc": {"count": amount},
+            "$setOnInsert": {
+                "user_id": user_id,
+                "day": day,
+                "expires_at": day + COUNTER_RETENTION
+            }
+        }
+
+        try:
+            await self.collection.find_one_and_update(
+                {"_id": key, "count": {"$lte": limit - amount}},
+                update,
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return True
+        except DuplicateKeyError:
+            pass
+
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            update,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["count"] <= limit:
+            return True
+
+        await self.collection.update_one({"_id": key}, {"$inc": {"count": -amount}})
+        return False
 
-from db.mongo import history
-from core.config import FREE_DAILY_QUESTION_LIMIT
+    async def refund(self, user_id: str, amount: int = 1):
+        # never below zero (counter may have rolled over to a new day)
+        await self.collection.update_one(
+            {
+                "_id": _counter_key(user_id, _today_start()),
+                "count": {"$gte": amount}
+            },
+            {"$inc": {"count": -amount}}
+        )
+
+    async def used_today(self, user_id: str) -> int:
+        doc = await self.collection.find_one(
+            {"_id": _counter_key(user_id, _today_start())}
+        )
+        return doc.get("count", 0) if doc else 0
+
+
+# ----------------------------------------
+# IN-MEMORY BACKEND (TESTS / SINGLE PROCESS)
+# ----------------------------------------
+class MemoryQuotaBackend:
+
+    def __init__(self):
+        self.day = None
+        self.counters = {}
+
+    def _roll_day(self):
+        # new UTC day -> previous counters expire
+        today = _today_start()
+        if today != self.day:
+            self.day = today
+            self.counters = {}
+
+    async def consume(
+        self,
+        user_id: str,
+        limit: int,
+        amount: int = 1
+    ) -> bool:
+        self._roll_day()
+
+        count = self.counters.get(user_id, 0)
+        if count + amount > limit:
+            return False
+
+        self.counters[user_id] = count + amount
+        return True
+
+    async def refund(self, user_id: str, amount: int = 1):
+        self._roll_day()
+        count = self.counters.get(user_id, 0)
+        self.counters[user_id] = max(0, count - amount)
+
+    async def used_today(self, user_id: str) -> int:
+        self._roll_day()
+        return self.counters.get(user_id, 0)
+
+
+if QUOTA_BACKEND == "memory":
+    quota_backend = MemoryQuotaBackend()
+else:
+    quota_backend = MongoQuotaBackend(usage_counters)
 
 
 # ----------------------------------------
 # CHECK DAILY LIMIT FOR FREE USERS
 # ----------------------------------------
-async def check_daily_limit(user_id: str, user_plan: str):
+async def check_daily_limit(
+    user_id: str,
+    user_plan: str,
+    amount: int = 1
+):
     """
     Free plan users ke daily question limit ko check karta hai
+    aur usi call me counter badha deta hai
     Paid users ko skip karta hai
     """
 
+    limit = daily_limit_for_plan(user_plan)
+
     # Paid users -> no limit
-    if user_plan != "free":
+    if limit is None:
         return True
 
-    # Aaj ki date range
-    today_start = datetime.utcnow().replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-    today_end = today_start + timedelta(days=1)
-
-    # Aaj ke questions count
-    count = await history.count_documents({
-        "user_id": user_id,
-        "created_at": {
-            "$gte": today_start,
-            "$lt": today_end
-        }
-    })
+    allowed = await quota_backend.consume(user_id, limit, amount)
 
-    if count >= FREE_DAILY_QUESTION_LIMIT:
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=(
-                f"Daily free limit reached ({FREE_DAILY_QUESTION_LIMIT}). "
+                f"Daily free limit reached ({limit}). "
                 "Upgrade to Pro or Ultra plan."
             )
         )
 
-    return True
\ No newline at end of file
+    return True
+
+
+# ----------------------------------------
+# REFUND (WORK THAT FAILED AFTER THE CHECK)
+# ----------------------------------------
+async def refund_daily_limit(
+    user_id: str,
+    user_plan: str,
+    amount: int = 1
+):
+    """
+    Gives back quota taken by check_daily_limit for questions
+    that were not answered
+    """
+    if amount <= 0 or daily_limit_for_plan(user_plan) is None:
+        return
+
+    await quota_backend.refund(user_id, amount)
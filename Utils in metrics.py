@@ -0,0 +1,388 @@
+"""
+Metrics Utility
+---------------
+- Tiny in-process registry (counters, gauges, histograms)
+- Prometheus text exposition format for /metrics
+- ASGI middleware: per-route / per-status request latency
+- pymongo command listener: per-collection command timings
+- Event-loop lag sampler
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [
+        f'{n}="{_escape(v)}"'
+        for n, v in zip(names, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+# ----------------------------------------
+# METRIC TYPES
+# ----------------------------------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(label_values)
+            if row is None:
+                row = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {row[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {row[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {row[-1]}")
+        return lines
+
+
+# ----------------------------------------
+# REGISTRY
+# ----------------------------------------
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+        # callables returning [(name, kind, help, [(labels_dict, value)])]
+        self._collectors: List[Callable] = []
+
+    def counter(self, name, help, labels=()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, labels=()) -> Gauge:
+        metric = Gauge(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable):
+        """
+        For stats that already live elsewhere (caches, queues):
+        read them only when /metrics is scraped
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    values = tuple(labels[n] for n in names)
+                    lines.append(f"{name}{_format_labels(names, values)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def stats_collector(prefix: str, stats_fn: Callable) -> Callable:
+    """
+    Exposes a nested stats() dict as gauges:
+    {"queue_wait": {"avg_ms": 1.2}} -> blackbrain_<prefix>_queue_wait_avg_ms
+    """
+    def flatten(data: dict, path: str):
+        for key, value in data.items():
+            name = f"{path}_{key}"
+            if isinstance(value, dict):
+                yield from flatten(value, name)
+            elif isinstance(value, (bool, int, float)):
+                yield name, float(value)
+
+    def collect():
+        return [
+            (name, "gauge", f"{prefix} stat", [({}, value)])
+            for name, value in flatten(stats_fn(), f"blackbrain_{prefix}")
+        ]
+
+    return collect
+
+# ----------------------------------------
+# CORE METRICS
+# ----------------------------------------
+http_request_duration = registry.histogram(
+    "blackbrain_http_request_duration_seconds",
+    "HTTP request latency by route and status",
+    labels=("method", "route", "status")
+)
+mongo_command_duration = registry.histogram(
+    "blackbrain_mongo_command_duration_seconds",
+    "MongoDB command latency by collection and command",
+    labels=("collection", "command", "outcome")
+)
+event_loop_lag = registry.gauge(
+    "blackbrain_event_loop_lag_seconds",
+    "Delay of a scheduled event-loop wakeup"
+)
+brain_mode_total = registry.counter(
+    "blackbrain_brain_mode_total",
+    "Brain engine runs by mode",
+    labels=("mode",)
+)
+
+
+# ----------------------------------------
+# HTTP MIDDLEWARE (PURE ASGI)
+# ----------------------------------------
+class MetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # route template, not raw path, keeps label count bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None)
+            if route_path is None:
+                route_path = (
+                    "/static" if scope["path"].startswith("/static")
+                    else "unmatched"
+                )
+
+            http_request_duration.observe(
+                scope["method"],
+                route_path,
+                str(status_code[0]),
+                value=time.perf_counter() - started
+            )
+
+
+# ----------------------------------------
+# MONGO COMMAND LISTENER
+# ----------------------------------------
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Pass to the client: AsyncIOMotorClient(..., event_listeners=[...])
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        name = event.command_name
+        collection = event.command.get(name)
+        if name == "getMore":
+            collection = event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = "-"
+        self._pending[(event.connection_id, event.request_id)] = (collection, name)
+
+    def _finish(self, event, outcome: str):
+        key = (event.connection_id, event.request_id)
+        collection, name = self._pending.pop(key, ("-", event.command_name))
+        mongo_command_duration.observe(
+            collection,
+            name,
+            outcome,
+            value=event.duration_micros / 1_000_000
+        )
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+# ----------------------------------------
+# EVENT LOOP LAG
+# ----------------------------------------
+async def sample_event_loop_lag(interval: float):
+    while True:
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        event_loop_lag.set(value=max(0.0, time.perf_counter() - expected))
+
+
+# ----------------------------------------
+# MONGO CONNECTION POOL LISTENER
+# ----------------------------------------
+mongo_pool_connections = registry.gauge(
+    "blackbrain_mongo_pool_connections",
+    "Open MongoDB connections by state",
+    labels=("state",)
+)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Counts open / checked-out connections across all servers
+    """
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.pools_ready = 0
+        self._lock = threading.Lock()
+
+    def _publish(self):
+        mongo_pool_connections.set("open", value=self.open)
+        mongo_pool_connections.set("checked_out", value=self.checked_out)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        with self._lock:
+            self.pools_ready += 1
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self.pools_ready = max(0, self.pools_ready - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self._publish()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+            self._publish()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self._publish()
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+            self._publish()
+
+    def stats(self) -> dict:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "checkout_failures": self.checkout_failures,
+            "pools_ready": self.pools_ready
+        }
@@ -0,0 +1,101 @@
+"""
+Pagination Utility
+------------------
+- Opaque keyset cursors for (created_at, _id) ordered lists
+- Newest first, same order as the history index
+- Search results: (score, created_at, _id), best match first
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+# ----------------------------------------
+# SORT ORDER (MATCHES COMPOUND INDEX)
+# ----------------------------------------
+NEWEST_FIRST = [("created_at", -1), ("_id", -1)]
+# text search: relevance, then recency
+BEST_MATCH_FIRST = [("score", -1), ("created_at", -1), ("_id", -1)]
+
+
+# ----------------------------------------
+# CURSOR ENCODE / DECODE
+# ----------------------------------------
+def encode_cursor(item: dict, with_score: bool = False) -> str:
+    """
+    Builds cursor from last document of a page
+    """
+    data = {
+        "t": item["created_at"].isoformat(),
+        "id": str(item["_id"])
+    }
+    if with_score:
+        data["s"] = item["score"]
+    raw = json.dumps(data)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, with_score: bool = False) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        keys = (
+            datetime.fromisoformat(raw["t"]),
+            ObjectId(raw["id"])
+        )
+        if with_score:
+            keys = (float(raw["s"]),) + keys
+        return keys
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+# ----------------------------------------
+# QUERY HELPERS
+# ----------------------------------------
+def after_cursor_query(base_query: dict, cursor: str) -> dict:
+    """
+    Adds keyset condition: strictly older than cursor
+    """
+    created_at, last_id = decode_cursor(cursor)
+
+    return {
+        **base_query,
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}}
+        ]
+    }
+
+
+def after_score_cursor_query(base_query: dict, cursor: str) -> dict:
+    """
+    Keyset condition for BEST_MATCH_FIRST: lower score,
+    or same score and older
+    """
+    score, created_at, last_id = decode_cursor(cursor, with_score=True)
+
+    return {
+        **base_query,
+        "$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "created_at": {"$lt": created_at}},
+            {"score": score, "created_at": created_at, "_id": {"$lt": last_id}}
+        ]
+    }
+
+
+def next_cursor(last_item, count: int, limit: int, with_score: bool = False):
+    """
+    Returns cursor for next page, None on last page
+    """
+    if last_item is None or limit <= 0 or count < limit:
+        return None
+    return encode_cursor(last_item, with_score=with_score)
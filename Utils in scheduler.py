@@ -0,0 +1,234 @@
+"""
+Scheduler Utility
+-----------------
+Weighted fair queuing for async work, per tier.
+
+- Bounded pool: at most `workers` jobs run at once
+- Each tier has a weight; when slots are scarce, a tier with
+  weight 8 gets ~8x the slots of a weight-1 tier (stride scheduling),
+  but no tier starves
+- Admission control: per-tier queue limit -> 503 straight away
+- Deadline shedding: a job still queued after its deadline -> 503,
+  it is never started
+- Per-tier queue depth, wait time, shed / rejected metrics
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from utils.metrics import registry
+
+scheduler_queue_depth = registry.gauge(
+    "blackbrain_scheduler_queue_depth",
+    "Jobs waiting for a worker slot",
+    labels=("scheduler", "tier")
+)
+scheduler_wait = registry.histogram(
+    "blackbrain_scheduler_wait_seconds",
+    "Time from admission to start",
+    labels=("scheduler", "tier")
+)
+scheduler_dropped = registry.counter(
+    "blackbrain_scheduler_dropped_total",
+    "Jobs not run: rejected at admission or shed after deadline",
+    labels=("scheduler", "tier", "reason")
+)
+
+
+# ----------------------------------------
+# TIER STATE
+# ----------------------------------------
+class _Tier:
+
+    def __init__(self, name: str, weight: float, max_queue: int, deadline_ms: int):
+        self.name = name
+        self.stride = 1 / weight
+        self.max_queue = max_queue
+        self.deadline = deadline_ms / 1000
+        self.queue = deque()  # (future, deadline_at, queued_at)
+        self.pass_value = 0.0
+
+        self.started = 0
+        self.rejected = 0
+        self.shed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+# ----------------------------------------
+# WEIGHTED FAIR SCHEDULER
+# ----------------------------------------
+class WeightedFairScheduler:
+
+    def __init__(self, name: str, workers: int, tiers: Dict[str, dict]):
+        """
+        tiers: {"free": {"weight": 1, "max_queue": 100, "deadline_ms": 3000}}
+        """
+        self.name = name
+        self.workers = workers
+        self.active = 0
+        # pass value of the last dispatched job
+        self.virtual_time = 0.0
+        self.tiers = {
+            tier: _Tier(
+                tier,
+                weight=config["weight"],
+                max_queue=config["max_queue"],
+                deadline_ms=config["deadline_ms"]
+            )
+            for tier, config in tiers.items()
+        }
+
+    def _busy(self, detail: str):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"}
+        )
+
+    def _drop(self, tier: _Tier, reason: str):
+        if reason == "shed":
+            tier.shed += 1
+        else:
+            tier.rejected += 1
+        scheduler_dropped.inc(self.name, tier.name, reason)
+
+    def _depth_changed(self, tier: _Tier):
+        scheduler_queue_depth.set(self.name, tier.name, value=len(tier.queue))
+
+    # -------------------------
+    # DISPATCH
+    # -------------------------
+    def _next_tier(self) -> Optional[_Tier]:
+        waiting = [tier for tier in self.tiers.values() if tier.queue]
+        if not waiting:
+            return None
+        return min(waiting, key=lambda tier: tier.pass_value)
+
+    def _dispatch(self):
+        """
+        Hands free slots to queued jobs, lowest pass value first.
+        Expired or cancelled waiters are dropped without a slot.
+        """
+        now = time.monotonic()
+        while self.active < self.workers:
+            tier = self._next_tier()
+            if tier is None:
+                return
+
+            future, deadline_at, queued_at = tier.queue.popleft()
+            self._depth_changed(tier)
+
+            if future.done():
+                # caller gave up (deadline / disconnect)
+                continue
+            if deadline_at <= now:
+                self._drop(tier, "shed")
+                future.set_exception(self._busy("Server is busy, try again"))
+                continue
+
+            self.virtual_time = tier.pass_value
+            tier.pass_value += tier.stride
+
+            self.active += 1
+            self._record_wait(tier, now - queued_at)
+            future.set_result(None)
+
+    def _record_wait(self, tier: _Tier, waited: float):
+        tier.started += 1
+        tier.wait_total += waited
+        tier.wait_max = max(tier.wait_max, waited)
+        scheduler_wait.observe(self.name, tier.name, value=waited)
+
+    def _release(self):
+        self.active -= 1
+        self._dispatch()
+
+    # -------------------------
+    # RUN
+    # -------------------------
+    async def _acquire(self, tier_name: str):
+        """
+        Returns once the tier gets a slot.
+        Raises 503 when the tier queue is full or the deadline
+        passes before the job starts.
+        """
+        tier = self.tiers[tier_name]
+        now = time.monotonic()
+
+        if self.active < self.workers and not any(t.queue for t in self.tiers.values()):
+            # idle pool: run straight away
+            self.active += 1
+            self._record_wait(tier, 0.0)
+        else:
+            if len(tier.queue) >= tier.max_queue:
+                self._drop(tier, "rejected")
+                raise self._busy("Server is busy, try again")
+
+            if not tier.queue:
+                # a tier that was idle doesn't bank credit while away
+                tier.pass_value = max(tier.pass_value, self.virtual_time)
+
+            future = asyncio.get_running_loop().create_future()
+            tier.queue.append((future, now + tier.deadline, now))
+            self._depth_changed(tier)
+            # a slot may be free behind abandoned waiters
+            self._dispatch()
+
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=tier.deadline)
+            except asyncio.TimeoutError:
+                if not future.done():
+                    future.cancel()
+                    self._drop(tier, "shed")
+                    raise self._busy("Server is busy, try again")
+                if future.exception() is not None:
+                    raise future.exception()
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    # slot was granted just as the caller went away
+                    self._release()
+                else:
+                    future.cancel()
+                raise
+
+    @asynccontextmanager
+    async def slot(self, tier_name: str):
+        """
+        async with scheduler.slot("free"): ... (streaming work)
+        """
+        await self._acquire(tier_name)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def run(self, tier_name: str, fn: Callable[..., Awaitable], *args, **kwargs):
+        async with self.slot(tier_name):
+            return await fn(*args, **kwargs)
+
+    def stats(self) -> dict:
+        tiers = {}
+        for name, tier in self.tiers.items():
+            tiers[name] = {
+                "queued": len(tier.queue),
+                "max_queue": tier.max_queue,
+                "started": tier.started,
+                "rejected": tier.rejected,
+                "shed": tier.shed,
+                "wait_avg_ms": (
+                    round(tier.wait_total / tier.started * 1000, 3)
+                    if tier.started else 0.0
+                ),
+                "wait_max_ms": round(tier.wait_max * 1000, 3)
+            }
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "tiers": tiers
+        }
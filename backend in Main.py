@@ -1,6 +1,96 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+
+from core.config import (
+    METRICS_ENABLED,
+    EVENT_LOOP_LAG_INTERVAL_MS,
+    ENTITLEMENTS_REFRESH_SECONDS,
+    INVALIDATION_BUS_ENABLED,
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    STATIC_DIR
+)
+from utils.compression import CompressionMiddleware, PrecompressedStaticFiles
+from utils.metrics import (
+    MetricsMiddleware,
+    registry,
+    sample_event_loop_lag,
+    stats_collector
+)
+
+# ----------------------------------------
+# STARTUP / SHUTDOWN (LIFESPAN)
+# ----------------------------------------
+from db import mongo
+from db.history_writer import (
+    start_history_writer,
+    stop_history_writer,
+    history_writer
+)
+from core.security import password_executor
+from core.plan_guard import refresh_entitlements_forever
+from core.expiry_sweeper import run_expiry_sweeper
+from core.ai_provider import close_ai_provider, ai_provider_stats
+from core.brain_scheduler import brain_scheduler_stats
+from core.history_lifecycle import resume_history_jobs, stop_history_jobs
+from core.identity_cache import on_user_change, on_invalidation_mode
+from core.plan_guard import entitlements_listener
+from core.invalidation_bus import invalidation_bus
+from core.payment_gateway import gateway_executor, gateway_stats
+from core.payment_webhook import resume_payment_events, stop_payment_events
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # connection warm-up + index reconcile before serving traffic
+    await mongo.connect()
+    await start_history_writer()
+    # clears interrupted by the last shutdown / crash
+    await resume_history_jobs()
+    # webhook events acked but not applied before the last shutdown
+    await resume_payment_events()
+
+    background_tasks = [
+        asyncio.create_task(refresh_entitlements_forever(
+            mongo.settings,
+            ENTITLEMENTS_REFRESH_SECONDS
+        )),
+        asyncio.create_task(run_expiry_sweeper())
+    ]
+    if INVALIDATION_BUS_ENABLED:
+        # other workers' plan / entitlement writes -> local caches
+        invalidation_bus.subscribe(mongo.users, on_user_change)
+        invalidation_bus.subscribe(mongo.settings, entitlements_listener(mongo.settings))
+        invalidation_bus.on_mode(on_invalidation_mode)
+        invalidation_bus.start()
+    if METRICS_ENABLED:
+        background_tasks.append(asyncio.create_task(
+            sample_event_loop_lag(EVENT_LOOP_LAG_INTERVAL_MS / 1000)
+        ))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    # let them unwind (pending Mongo calls) before the client closes
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await stop_history_jobs()
+    await stop_payment_events()
+    await invalidation_bus.stop()
+    # drain queued history before closing the client
+    await stop_history_writer()
+    # in-flight hashes / gateway calls finish off the loop
+    await asyncio.gather(
+        asyncio.to_thread(password_executor.shutdown),
+        asyncio.to_thread(gateway_executor.shutdown)
+    )
+    await close_ai_provider()
+    mongo.close()
 
 # ----------------------------------------
 # CREATE APP
@@ -8,7 +98,8 @@ from fastapi.staticfiles import StaticFiles
 app = FastAPI(
     title="BlackBrain",
     description="BlackBrain - Logical Problem Solving & Decision Making App",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # ----------------------------------------
@@ -23,9 +114,32 @@ app.add_middleware(
 )
 
 # ----------------------------------------
-# STATIC FILES (if needed later)
+# COMPRESSION (gzip / brotli, complete bodies only)
+# ----------------------------------------
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY
+    )
+
+# ----------------------------------------
+# METRICS (per-route latency histograms)
 # ----------------------------------------
-app.mount("/static", StaticFiles(directory="static"), name="static")
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# ----------------------------------------
+# STATIC FILES
+# ----------------------------------------
+# .br / .gz siblings + immutable caching for hashed names
+# (build with: python -m scripts.build_static)
+app.mount(
+    "/static",
+    PrecompressedStaticFiles(directory=STATIC_DIR),
+    name="static"
+)
 
 # ----------------------------------------
 # ROUTES IMPORT
@@ -61,4 +175,72 @@ def root():
 # ----------------------------------------
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+# ----------------------------------------
+# READINESS (MONGO POOL + INDEXES)
+# ----------------------------------------
+@app.get("/ready")
+async def readiness_check():
+    report = await mongo.readiness()
+    return JSONResponse(
+        content=report,
+        status_code=200 if report["ready"] else 503
+    )
+
+# ----------------------------------------
+# METRICS (PROMETHEUS TEXT FORMAT)
+# ----------------------------------------
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(
+        content=registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+# ----------------------------------------
+# RUNTIME STATS
+# ----------------------------------------
+from core.identity_cache import identity_cache_stats
+from core.response_cache import response_cache_stats
+
+registry.register_collector(stats_collector("identity_cache", identity_cache_stats))
+registry.register_collector(stats_collector("history_writer", history_writer.stats))
+registry.register_collector(stats_collector("password_hash", password_executor.stats))
+registry.register_collector(stats_collector("response_cache", response_cache_stats))
+registry.register_collector(stats_collector("ai_provider", ai_provider_stats))
+registry.register_collector(stats_collector("brain_scheduler", brain_scheduler_stats))
+registry.register_collector(stats_collector("invalidation_bus", invalidation_bus.stats))
+registry.register_collector(stats_collector("payment_gateway", gateway_stats))
+
+@app.get("/health/identity-cache")
+def identity_cache_health():
+    return identity_cache_stats()
+
+@app.get("/health/history-writer")
+def history_writer_health():
+    return history_writer.stats()
+
+@app.get("/health/password-hash")
+def password_hash_health():
+    return password_executor.stats()
+
+@app.get("/health/response-cache")
+def response_cache_health():
+    return response_cache_stats()
+
+@app.get("/health/ai-provider")
+def ai_provider_health():
+    return ai_provider_stats()
+
+@app.get("/health/brain-scheduler")
+def brain_scheduler_health():
+    return brain_scheduler_stats()
+
+@app.get("/health/invalidation-bus")
+def invalidation_bus_health():
+    return invalidation_bus.stats()
+
+@app.get("/health/payment-gateway")
+def payment_gateway_health():
+    return gateway_stats()
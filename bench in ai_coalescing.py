@@ -0,0 +1,80 @@
+"""
+AI Coalescing Benchmark
+-----------------------
+Offline (stub provider) comparison of concurrent model-backed asks.
+
+- direct:    every ask makes its own upstream call
+- coalesced: identical in-flight asks share one upstream call
+
+Workload: --asks concurrent asks spread over --distinct questions,
+so a hot question is asked many times at once.
+
+Run from backend folder:
+    python -m bench.ai_coalescing --asks 500 --distinct 10 --latency-ms 300
+"""
+
+import argparse
+import asyncio
+import time
+
+from core.ai_provider import StubProvider
+from core.brain_engine import MODE_PROMPTS
+from bench.login_storm import summary
+
+
+async def timed(call, latencies: list):
+    started = time.perf_counter()
+    await call
+    latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(provider: StubProvider, questions: list, coalesce: bool) -> dict:
+    system = MODE_PROMPTS["problem"]
+    latencies = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        timed(
+            provider.complete(system, question) if coalesce
+            else provider._call(system, question),
+            latencies
+        )
+        for question in questions
+    ))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "upstream_calls": provider.calls,
+        "coalesced": provider.coalesced,
+        "wall_s": round(elapsed, 3),
+        **summary(latencies)
+    }
+
+
+async def main(asks: int, distinct: int, latency_ms: int, concurrency: int):
+    questions = [
+        f"I feel stuck in my career, question {i % distinct}"
+        for i in range(asks)
+    ]
+
+    def provider():
+        return StubProvider(
+            latency_ms=latency_ms,
+            jitter_ms=latency_ms // 4,
+            max_concurrency=concurrency,
+            timeout_seconds=600
+        )
+
+    print("direct    :", await run(provider(), questions, coalesce=False))
+    print("coalesced :", await run(provider(), questions, coalesce=True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--asks", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=10)
+    parser.add_argument("--latency-ms", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.asks, args.distinct, args.latency_ms, args.concurrency))
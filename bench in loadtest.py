@@ -0,0 +1,342 @@
+"""
+BlackBrain Load Test
+--------------------
+Drives the FastAPI app in-process (httpx ASGI transport), no network.
+
+- Mongo: in-memory stand-in by default, or a local mongod with
+  --mongo-uri (uses a throwaway database)
+- Scenarios: /auth/login, /brain/ask (every mode), /history/ paging
+  (skip + cursor), /subscription/status
+- Writes requests/sec and p50/p95/p99 latency per scenario to JSON
+- Compares against a stored baseline, exit code 1 on regression
+
+Run from backend folder:
+    python -m bench.loadtest --out bench_results.json
+    python -m bench.loadtest --baseline bench/baseline.json
+    python -m bench.loadtest --baseline bench/baseline.json --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+
+# ----------------------------------------
+# BACKEND SELECTION (BEFORE APP IMPORT)
+# ----------------------------------------
+def _configure_backend(mongo_uri: str):
+    if mongo_uri:
+        os.environ["MONGO_BACKEND"] = "motor"
+        os.environ["MONGO_URI"] = mongo_uri
+        os.environ.setdefault(
+            "MONGO_DB_NAME", f"blackbrain_bench_{int(time.time())}"
+        )
+    else:
+        os.environ["MONGO_BACKEND"] = "memory"
+    os.environ.setdefault("QUOTA_BACKEND", "memory")
+
+
+BRAIN_MODES = ["basic", "decision", "problem", "money", "study", "nobullshit"]
+PASSWORD = "bench-password"
+
+
+# ----------------------------------------
+# STATS
+# ----------------------------------------
+def percentile(ordered: list, p: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: list, statuses: dict, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    ok = sum(c for s, c in statuses.items() if 200 <= int(s) < 400)
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "status_counts": statuses,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0
+    }
+
+
+# ----------------------------------------
+# SCENARIO RUNNER
+# ----------------------------------------
+async def run_scenario(client, build_request, requests: int, concurrency: int):
+    """
+    build_request(i) -> (method, url, kwargs)
+    """
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            method, url, kwargs = build_request(i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            key = str(response.status_code)
+            statuses[key] = statuses.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+# ----------------------------------------
+# FIXTURES
+# ----------------------------------------
+async def signup(client, email: str) -> dict:
+    response = await client.post(
+        "/auth/signup",
+        json={"email": email, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def set_plan(email: str, plan_code: str):
+    from db.mongo import users
+    from core.identity_cache import invalidate_user
+
+    user = await users.find_one({"email": email})
+    await users.update_one(
+        {"_id": user["_id"]},
+        {"$set": {
+            "plan": plan_code,
+            "plan_expiry": datetime.utcnow() + timedelta(days=365)
+        }}
+    )
+    invalidate_user(str(user["_id"]))
+    return str(user["_id"])
+
+
+async def seed_history(user_id: str, count: int):
+    from db.mongo import history
+    from core.brain_engine import run_brain_engine, pack_response
+
+    now = datetime.utcnow()
+    docs = []
+    for i in range(count):
+        mode = BRAIN_MODES[i % len(BRAIN_MODES)]
+        question = "2500" if mode == "money" else f"seeded question {i}"
+        docs.append({
+            "user_id": user_id,
+            "question": question,
+            "mode": mode,
+            **pack_response(question, run_brain_engine(question, mode)),
+            "created_at": now - timedelta(seconds=i)
+        })
+    await history.insert_many(docs, ordered=True)
+
+
+# ----------------------------------------
+# SUITE
+# ----------------------------------------
+async def run_suite(args) -> dict:
+    import httpx
+    from main import app
+
+    results = {}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench"
+        ) as client:
+
+            await signup(client, "login@bench.example.com")
+            paid_headers = await signup(client, "ultra@bench.example.com")
+            paid_user_id = await set_plan("ultra@bench.example.com", "yearly")
+            await seed_history(paid_user_id, args.history_size)
+
+            scenarios = [
+                ("auth_login", lambda i: (
+                    "POST", "/auth/login",
+                    {"json": {"email": "login@bench.example.com", "password": PASSWORD}}
+                )),
+            ]
+
+            for mode in BRAIN_MODES:
+                question = "5000" if mode == "money" else "Should I switch jobs?"
+                scenarios.append((
+                    f"brain_ask_{mode}",
+                    lambda i, mode=mode, question=question: (
+                        "POST", "/brain/ask",
+                        {"json": {"question": question, "mode": mode},
+                         "headers": paid_headers}
+                    )
+                ))
+
+            page = args.page_size
+            pages = max(1, args.history_size // page)
+            scenarios.append(("history_skip", lambda i: (
+                "GET", f"/history/?limit={page}&skip={(i % pages) * page}",
+                {"headers": paid_headers}
+            )))
+
+            # cursor walk: first page, then follow next_cursor
+            first = await client.get(
+                f"/history/?limit={page}", headers=paid_headers
+            )
+            cursors = [None]
+            next_cursor = first.json().get("next_cursor")
+            while next_cursor and len(cursors) < pages:
+                cursors.append(next_cursor)
+                body = (await client.get(
+                    f"/history/?limit={page}&after={next_cursor}",
+                    headers=paid_headers
+                )).json()
+                next_cursor = body.get("next_cursor")
+
+            scenarios.append(("history_cursor", lambda i: (
+                "GET",
+                f"/history/?limit={page}"
+                + (f"&after={cursors[i % len(cursors)]}"
+                   if cursors[i % len(cursors)] else ""),
+                {"headers": paid_headers}
+            )))
+
+            scenarios.append(("subscription_status", lambda i: (
+                "GET", "/subscription/status", {"headers": paid_headers}
+            )))
+
+            for name, build_request in scenarios:
+                if args.only and name not in args.only:
+                    continue
+                requests = args.requests
+                concurrency = args.concurrency
+                if name == "auth_login":
+                    # bcrypt bound: fewer requests, stay under the
+                    # password pool's queue so 503 shedding doesn't kick in
+                    requests = max(1, args.requests // 10)
+                    concurrency = min(concurrency, 4)
+
+                # warm-up, not recorded
+                await run_scenario(
+                    client, build_request, min(20, requests), concurrency
+                )
+                results[name] = await run_scenario(
+                    client, build_request, requests, concurrency
+                )
+                print(
+                    f"{name:24} {results[name]['rps']:>9} rps  "
+                    f"p50 {results[name]['p50_ms']:>8} ms  "
+                    f"p95 {results[name]['p95_ms']:>8} ms  "
+                    f"p99 {results[name]['p99_ms']:>8} ms  "
+                    f"errors {results[name]['errors']}"
+                )
+
+    return results
+
+
+# ----------------------------------------
+# BASELINE COMPARISON
+# ----------------------------------------
+def compare(results: dict, baseline: dict, max_latency: float, max_rps_drop: float) -> list:
+    """
+    Returns list of regression messages (empty = pass)
+    """
+    regressions = []
+
+    for name, current in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+
+        for key in ("p95_ms", "p99_ms"):
+            if base[key] and current[key] > base[key] * (1 + max_latency):
+                regressions.append(
+                    f"{name}: {key} {current[key]} > baseline {base[key]} "
+                    f"(+{int(max_latency * 100)}% allowed)"
+                )
+
+        if base["rps"] and current["rps"] < base["rps"] * (1 - max_rps_drop):
+            regressions.append(
+                f"{name}: rps {current['rps']} < baseline {base['rps']} "
+                f"(-{int(max_rps_drop * 100)}% allowed)"
+            )
+
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(
+                f"{name}: errors {current['errors']} > baseline {base.get('errors', 0)}"
+            )
+
+    return regressions
+
+
+# ----------------------------------------
+# MAIN
+# ----------------------------------------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="BlackBrain offline load test")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--history-size", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--mongo-uri", default="", help="local mongod instead of in-memory")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--max-latency-regression", type=float, default=0.20)
+    parser.add_argument("--max-throughput-drop", type=float, default=0.20)
+    args = parser.parse_args(argv)
+
+    _configure_backend(args.mongo_uri)
+    results = asyncio.run(run_suite(args))
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "mongo": "mongod" if args.mongo_uri else "memory",
+            "requests": args.requests,
+            "concurrency": args.concurrency
+        },
+        "scenarios": results
+    }
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results -> {args.out}")
+
+    if not args.baseline:
+        return 0
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved -> {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(
+        results,
+        baseline,
+        args.max_latency_regression,
+        args.max_throughput_drop
+    )
+    for line in regressions:
+        print("REGRESSION", line)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
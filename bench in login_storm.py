@@ -0,0 +1,155 @@
+"""
+Login Storm Benchmark
+---------------------
+Shows /brain/ask latency while many logins verify bcrypt hashes.
+
+Drives the FastAPI app in-process (httpx ASGI transport, in-memory
+Mongo, like bench.loadtest): POST /auth/login storm + POST /brain/ask
+at a steady rate. Ask latency counts from the scheduled send time, so
+time spent waiting on a blocked loop shows up.
+
+- inline:   login verifies the hash on the event loop (old way,
+            verify_password_async swapped for a direct call)
+- executor: login as shipped, bounded password pool
+
+Run from backend folder:
+    python -m bench.login_storm --logins 200 --asks 400
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import contextmanager
+
+from bench.loadtest import PASSWORD, _configure_backend, set_plan, signup
+
+LOGIN_EMAIL = "storm@bench.example.com"
+ASK_EMAIL = "asker@bench.example.com"
+
+
+# ----------------------------------------
+# WORKLOAD
+# ----------------------------------------
+async def ask(client, headers: dict, due: float, latencies: list, statuses: dict):
+    response = await client.post(
+        "/brain/ask",
+        json={"question": "I feel stuck in my career", "mode": "problem"},
+        headers=headers
+    )
+    latencies.append((time.perf_counter() - due) * 1000)
+    key = str(response.status_code)
+    statuses[key] = statuses.get(key, 0) + 1
+
+
+async def login(client, statuses: dict):
+    response = await client.post(
+        "/auth/login",
+        json={"email": LOGIN_EMAIL, "password": PASSWORD}
+    )
+    # pool may shed excess logins with 503, that's expected
+    key = str(response.status_code)
+    statuses[key] = statuses.get(key, 0) + 1
+
+
+@contextmanager
+def inline_verify():
+    """
+    Login route verifying on the loop, as before the password pool
+    """
+    import routes.auth
+    from core.security import verify_password
+
+    async def verify_inline(plain_password: str, hashed_password: str) -> bool:
+        return verify_password(plain_password, hashed_password)
+
+    shipped = routes.auth.verify_password_async
+    routes.auth.verify_password_async = verify_inline
+    try:
+        yield
+    finally:
+        routes.auth.verify_password_async = shipped
+
+
+async def asks_during(client, headers: dict, logins: int, asks: int, interval: float) -> dict:
+    latencies, ask_statuses, login_statuses = [], {}, {}
+
+    storm = asyncio.gather(*[login(client, login_statuses) for _ in range(logins)])
+
+    ask_tasks = []
+    started = time.perf_counter()
+    for i in range(asks):
+        # fixed schedule: a stalled loop doesn't push later asks back
+        due = started + i * interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        ask_tasks.append(asyncio.create_task(
+            ask(client, headers, due, latencies, ask_statuses)
+        ))
+
+    await asyncio.gather(*ask_tasks)
+    await storm
+    return {
+        **summary(latencies),
+        "asks": ask_statuses,
+        "logins": login_statuses
+    }
+
+
+def summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+    return {
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1], 3),
+        "mean_ms": round(statistics.mean(ordered), 3)
+    }
+
+
+# ----------------------------------------
+# MAIN
+# ----------------------------------------
+async def main(logins: int, asks: int, interval_ms: float):
+    import httpx
+    from main import app
+
+    interval = interval_ms / 1000
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            timeout=None
+        ) as client:
+            await signup(client, LOGIN_EMAIL)
+            headers = await signup(client, ASK_EMAIL)
+            # paid plan: no daily limit in the way
+            await set_plan(ASK_EMAIL, "yearly")
+
+            # warm-up, not recorded
+            await asks_during(client, headers, 0, 20, interval)
+
+            baseline = await asks_during(client, headers, 0, asks, interval)
+            with inline_verify():
+                inline = await asks_during(client, headers, logins, asks, interval)
+            pooled = await asks_during(client, headers, logins, asks, interval)
+
+    print("no logins :", baseline)
+    print("inline    :", inline)
+    print("executor  :", pooled)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--asks", type=int, default=400)
+    parser.add_argument("--interval-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    _configure_backend("")
+    asyncio.run(main(args.logins, args.asks, args.interval_ms))
@@ -0,0 +1,96 @@
+"""
+Priority Spike Benchmark
+------------------------
+Paid latency while free traffic spikes, offline (stub provider).
+
+- fifo:     one tier, everyone shares one queue
+- weighted: plan tiers (priority / paid / free) from config
+
+Each job is one model-backed ask through the stub provider.
+
+Run from backend folder:
+    python -m bench.priority_spike --free 600 --paid 60 --workers 16
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+from core.ai_provider import StubProvider
+from core.brain_engine import MODE_PROMPTS
+from core.config import BRAIN_SCHEDULER_TIERS
+from utils.scheduler import WeightedFairScheduler
+from bench.login_storm import summary
+
+
+async def job(scheduler, tier: str, provider, question: str, out: dict):
+    started = time.perf_counter()
+    try:
+        await scheduler.run(tier, provider.complete, MODE_PROMPTS["problem"], question)
+    except HTTPException:
+        out["dropped"] += 1
+        return
+    out["latencies"].append((time.perf_counter() - started) * 1000)
+
+
+async def run(scheduler, tier_of, free: int, paid: int, latency_ms: int) -> dict:
+    provider = StubProvider(
+        latency_ms=latency_ms,
+        jitter_ms=latency_ms // 4,
+        max_concurrency=10_000,
+        timeout_seconds=600
+    )
+    results = {
+        plan: {"latencies": [], "dropped": 0}
+        for plan in ("free", "ultra_monthly")
+    }
+
+    tasks = []
+    # free spike arrives first, paid users trickle in behind it
+    for i in range(free):
+        tasks.append(asyncio.create_task(job(
+            scheduler, tier_of("free"), provider, f"free question {i}", results["free"]
+        )))
+    for i in range(paid):
+        tasks.append(asyncio.create_task(job(
+            scheduler, tier_of("ultra_monthly"), provider,
+            f"paid question {i}", results["ultra_monthly"]
+        )))
+        await asyncio.sleep(latency_ms / 1000 / 4)
+
+    await asyncio.gather(*tasks)
+
+    return {
+        plan: {
+            "done": len(data["latencies"]),
+            "dropped": data["dropped"],
+            **(summary(data["latencies"]) if data["latencies"] else {})
+        }
+        for plan, data in results.items()
+    }
+
+
+async def main(free: int, paid: int, workers: int, latency_ms: int):
+    fifo = WeightedFairScheduler(
+        "bench_fifo",
+        workers=workers,
+        tiers={"all": {"weight": 1, "max_queue": 100_000, "deadline_ms": 600_000}}
+    )
+    weighted = WeightedFairScheduler("bench_weighted", workers=workers, tiers=BRAIN_SCHEDULER_TIERS)
+    tier_map = {"free": "free", "ultra_monthly": "priority"}
+
+    print("fifo     :", await run(fifo, lambda plan: "all", free, paid, latency_ms))
+    print("weighted :", await run(weighted, tier_map.get, free, paid, latency_ms))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--free", type=int, default=600)
+    parser.add_argument("--paid", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.free, args.paid, args.workers, args.latency_ms))
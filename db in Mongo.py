@@ -3,15 +3,53 @@ MongoDB Connection Module (Async)
 --------------------------------
 - Connects to MongoDB using Motor
 - Exposes database & collections
+- MONGO_BACKEND=memory -> in-process stand-in (tests / benchmarks)
+- Lifespan hooks: connect (warm-up + index reconcile), close
+- Readiness report for /ready (pool + index state)
 """
 
-from motor.motor_asyncio import AsyncIOMotorClient
-from core.config import MONGO_URI, MONGO_DB_NAME
+import asyncio
+import logging
+import time
+
+from core.config import (
+    MONGO_URI,
+    MONGO_DB_NAME,
+    MONGO_BACKEND,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_WARMUP_CONNECTIONS,
+    METRICS_ENABLED
+)
+from utils.metrics import MongoCommandMetrics, MongoPoolMetrics
+
+logger = logging.getLogger(__name__)
+
+pool_metrics = MongoPoolMetrics()
 
 # ----------------------------------------
 # CREATE MONGO CLIENT
 # ----------------------------------------
-client = AsyncIOMotorClient(MONGO_URI)
+# Motor connects lazily: building the client here opens no sockets,
+# connect() below does the warm-up inside the app lifespan.
+if MONGO_BACKEND == "memory":
+    from db.memory_mongo import MemoryClient
+    client = MemoryClient()
+else:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(
+        MONGO_URI,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        event_listeners=(
+            [MongoCommandMetrics(), pool_metrics] if METRICS_ENABLED
+            else [pool_metrics]
+        )
+    )
 
 # ----------------------------------------
 # DATABASE
@@ -27,23 +65,246 @@ questions = db["questions"]
 answers = db["answers"]
 history = db["history"]
 settings = db["settings"]
+usage_counters = db["usage_counters"]
+jobs = db["jobs"]
+# gateway webhook events, _id = gateway event id (dedupe)
+payment_events = db["payment_events"]
+# cold tier: one compressed bucket per user per month
+history_archive = db["history_archive"]
 
 # ----------------------------------------
-# OPTIONAL: INDEXES (SAFE TO CALL ON START)
+# INDEXES (QUERY SHAPES THE APP RUNS)
 # ----------------------------------------
+# (collection, keys, options)
+INDEX_SPECS = [
+    # login / signup lookup
+    (users, [("email", 1)], {"unique": True}),
+    (users, [("created_at", 1)], {}),
+    # expiry sweeper: paid plans past plan_expiry
+    (users, [("plan", 1), ("plan_expiry", 1)], {}),
+
+    (subscriptions, [("user_id", 1)], {}),
+    (subscriptions, [("plan", 1)], {}),
+    # pending checkout orders, removed by TTL after expires_at
+    (subscriptions, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+
+    (questions, [("user_id", 1)], {}),
+    (questions, [("created_at", 1)], {}),
+
+    # history list / keyset paging (also serves user_id-only filters)
+    (history, [("user_id", 1), ("created_at", -1), ("_id", -1)], {}),
+    (history, [("created_at", 1)], {}),
+    # clear jobs: one user's history in _id-ordered chunks
+    (history, [("user_id", 1), ("_id", 1)], {}),
+    # per-plan retention: docs with expires_at are removed by TTL
+    (history, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    # /history/search: per-user text search, mode as suffix filter.
+    # search_text holds a template token + variable text only
+    (
+        history,
+        [
+            ("user_id", 1),
+            ("question", "text"),
+            ("search_text", "text"),
+            ("mode", 1)
+        ],
+        {
+            "name": "history_search_v2",
+            "weights": {"question": 10, "search_text": 2},
+            # Hinglish text: no English stemming / stop words
+            "default_language": "none"
+        }
+    ),
+
+    # archived history, newest bucket first; TTL for limited plans
+    (history_archive, [("user_id", 1), ("newest_at", -1)], {}),
+    (history_archive, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+
+    # daily quota counters, removed by TTL after expires_at
+    (usage_counters, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+
+    # webhook events: unprocessed ones resumed on startup, old ones expire
+    (payment_events, [("status", 1), ("received_at", 1)], {}),
+    (payment_events, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+
+    # background jobs: active job per user, finished ones expire
+    (jobs, [("user_id", 1), ("type", 1), ("status", 1)], {}),
+    (jobs, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
+# options that change what an existing index does
+COMPARED_OPTIONS = ("expireAfterSeconds", "unique", "partialFilterExpression")
+
+# superseded indexes, dropped before the specs are reconciled
+# (one text index per collection: the old one must go first)
+RETIRED_INDEXES = [
+    # indexed the full rendered answer (response_text)
+    (history, "history_search"),
+]
+
+index_state = {
+    "reconciled": False,
+    "created": [],
+    "modified": [],
+    "errors": []
+}
+
+
+def _index_name(keys: list) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def _find_index(info: dict, keys: list, name: str = None):
+    """
+    (name, spec) of the existing index for keys, or None.
+    Text indexes come back as _fts/_ftsx keys -> match by name.
+    """
+    if name in info:
+        return name, info[name]
+    wanted = [tuple(k) for k in keys]
+    for index_name, spec in info.items():
+        if [tuple(k) for k in spec["key"]] == wanted:
+            return index_name, spec
+    return None
+
+
+def _option_mismatches(options: dict, spec: dict) -> dict:
+    """
+    {option: (wanted, found)} for the options that differ
+    """
+    mismatches = {}
+    for option in COMPARED_OPTIONS:
+        wanted, found = options.get(option), spec.get(option)
+        if option == "unique":
+            wanted, found = bool(wanted), bool(found)
+        if wanted != found:
+            mismatches[option] = (wanted, found)
+    return mismatches
+
+
 async def create_indexes():
     """
-    Creates important indexes for performance
-    Call once on app startup if needed
+    Idempotent: creates missing indexes, fixes TTL changes with
+    collMod. Other option mismatches (unique, partial filter) need
+    a rebuild: reported in errors, so /ready fails.
+    Runs on startup from the app lifespan.
+    """
+    created, modified, errors = [], [], []
+    existing = {}
+
+    for collection, name in RETIRED_INDEXES:
+        if name in await collection.index_information():
+            try:
+                await collection.drop_index(name)
+                modified.append(f"{collection.name}.{name} (dropped)")
+            except Exception as e:
+                errors.append(f"{collection.name}.{name}: drop failed: {e}")
+                logger.error("Dropping index %s failed: %s", name, e)
+
+    for collection, keys, options in INDEX_SPECS:
+        if collection.name not in existing:
+            existing[collection.name] = await collection.index_information()
+
+        name = f"{collection.name}.{_index_name(keys)}"
+        found = _find_index(existing[collection.name], keys, options.get("name"))
+
+        if found is None:
+            try:
+                await collection.create_index(keys, **options)
+                created.append(name)
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+                logger.error("Index %s failed: %s", name, e)
+            continue
+
+        index_name, spec = found
+        mismatches = _option_mismatches(options, spec)
+        ttl = mismatches.pop("expireAfterSeconds", None)
+
+        # TTL -> other TTL is an in-place change
+        if ttl is not None and None not in ttl:
+            try:
+                await collection.database.command(
+                    "collMod",
+                    collection.name,
+                    index={"name": index_name, "expireAfterSeconds": ttl[0]}
+                )
+                modified.append(name)
+            except Exception as e:
+                errors.append(f"{name}: TTL change failed: {e}")
+                logger.error("Index %s TTL change failed: %s", name, e)
+        elif ttl is not None:
+            mismatches["expireAfterSeconds"] = ttl
+
+        for option, (wanted, found_value) in mismatches.items():
+            errors.append(f"{name}: {option} is {found_value!r}, expected {wanted!r}")
+            logger.error("Index %s: %s is %r, expected %r", name, option, found_value, wanted)
+
+    index_state.update({
+        "reconciled": not errors,
+        "created": created,
+        "modified": modified,
+        "errors": errors
+    })
+    return index_state
+
+
+# ----------------------------------------
+# LIFESPAN HOOKS
+# ----------------------------------------
+async def connect():
+    """
+    Ping (fails fast on bad URI), open warm-up connections,
+    reconcile indexes
     """
-    await users.create_index("email", unique=True)
-    await users.create_index("created_at")
+    started = time.perf_counter()
+    await client.admin.command("ping")
+
+    # concurrent pings make the pool open several sockets now
+    # instead of on the first burst of user requests
+    if MONGO_WARMUP_CONNECTIONS > 1:
+        await asyncio.gather(*[
+            client.admin.command("ping")
+            for _ in range(MONGO_WARMUP_CONNECTIONS)
+        ])
 
-    await subscriptions.create_index("user_id")
-    await subscriptions.create_index("plan")
+    await create_indexes()
+    logger.info(
+        "Mongo ready in %.1f ms", (time.perf_counter() - started) * 1000
+    )
 
-    await questions.create_index("user_id")
-    await questions.create_index("created_at")
 
-    await history.create_index("user_id")
-    await history.create_index("created_at")
\ No newline at end of file
+def close():
+    client.close()
+
+
+# ----------------------------------------
+# READINESS
+# ----------------------------------------
+async def readiness(timeout: float = 2.0) -> dict:
+    ping_ms = None
+    reachable = True
+    try:
+        started = time.perf_counter()
+        await asyncio.wait_for(client.admin.command("ping"), timeout)
+        ping_ms = round((time.perf_counter() - started) * 1000, 3)
+    except Exception:
+        reachable = False
+
+    return {
+        "ready": reachable and index_state["reconciled"],
+        "mongo": {
+            "backend": MONGO_BACKEND,
+            "reachable": reachable,
+            "ping_ms": ping_ms
+        },
+        "pool": {
+            "min_size": MONGO_MIN_POOL_SIZE,
+            "max_size": MONGO_MAX_POOL_SIZE,
+            **pool_metrics.stats()
+        },
+        "indexes": {
+            "expected": len(INDEX_SPECS),
+            **index_state
+        }
+    }
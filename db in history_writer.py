@@ -0,0 +1,285 @@
+"""
+History Writer
+--------------
+- Saves brain answers into history collection
+- Optional write-behind mode (HISTORY_WRITE_BEHIND=true):
+  documents go into a bounded async queue and are
+  flushed with insert_many by size or time
+- Queue full -> caller waits (backpressure), then
+  falls back to a direct insert
+- Failed flush -> only the documents that failed are retried
+  (backoff), then written one by one; duplicate _id on a retry
+  means an earlier attempt already wrote it
+- Queue is drained on shutdown
+"""
+
+import asyncio
+import logging
+import time
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from core.config import (
+    HISTORY_WRITE_BEHIND,
+    HISTORY_WRITE_BEHIND_MAX_QUEUE,
+    HISTORY_WRITE_BEHIND_BATCH_SIZE,
+    HISTORY_WRITE_BEHIND_FLUSH_MS,
+    HISTORY_WRITE_BEHIND_PUT_TIMEOUT_MS,
+    HISTORY_WRITE_BEHIND_RETRIES,
+    HISTORY_WRITE_BEHIND_RETRY_MS
+)
+from db.mongo import history
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+# ----------------------------------------
+# WRITE-BEHIND QUEUE
+# ----------------------------------------
+class HistoryWriteBehind:
+
+    def __init__(
+        self,
+        collection,
+        max_queue: int,
+        batch_size: int,
+        flush_ms: int,
+        put_timeout_ms: int,
+        retries: int = 3,
+        retry_ms: int = 100
+    ):
+        self.collection = collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.put_timeout = put_timeout_ms / 1000
+        self.retries = retries
+        self.retry_delay = retry_ms / 1000
+
+        self._queue = None
+        self._task = None
+        self._closing = False
+
+        # metrics
+        self.enqueued = 0
+        self.direct_writes = 0
+        self.flushes = 0
+        self.flushed_docs = 0
+        self.failed_docs = 0
+        self.retried_docs = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops accepting work, drains queue, final flush
+        """
+        if not self.running:
+            return
+
+        self._closing = True
+        await self._queue.put(None)  # stop marker
+        await self._task
+        self._task = None
+
+    async def save(self, doc: dict):
+        if self._closing or not self.running:
+            await self._direct_write(doc)
+            return
+
+        try:
+            await asyncio.wait_for(
+                self._queue.put(doc),
+                timeout=self.put_timeout
+            )
+            self.enqueued += 1
+        except asyncio.TimeoutError:
+            # queue stayed full -> write inline, never drop
+            await self._direct_write(doc)
+
+    async def save_many(self, docs: list):
+        """
+        Docs from one request: queued one by one, or a single
+        ordered insert_many when writing directly
+        """
+        if self._closing or not self.running:
+            self.direct_writes += len(docs)
+            await self.collection.insert_many(docs, ordered=True)
+            return
+
+        for doc in docs:
+            await self.save(doc)
+
+    async def _direct_write(self, doc: dict):
+        self.direct_writes += 1
+        await self.collection.insert_one(doc)
+
+    async def _run(self):
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    doc = await asyncio.wait_for(
+                        self._queue.get(),
+                        timeout=remaining
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+                if doc is None:
+                    stopping = True
+                    break
+                batch.append(doc)
+
+            await self._flush(batch)
+
+        # drain whatever is still queued after the stop marker
+        leftover = []
+        while not self._queue.empty():
+            doc = self._queue.get_nowait()
+            if doc is not None:
+                leftover.append(doc)
+
+        for i in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[i:i + self.batch_size])
+
+    async def _flush(self, batch: list):
+        started = time.perf_counter()
+
+        pending = await self._insert_batch(batch)
+        for attempt in range(self.retries):
+            if not pending:
+                break
+            self.retried_docs += len(pending)
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            pending = await self._insert_batch(pending)
+
+        # still failing: one by one, so a bad document can't sink the rest
+        for doc in pending:
+            await self._insert_single(doc)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.total_flush_ms += elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+    async def _insert_batch(self, docs: list) -> list:
+        """
+        Returns the documents that still need writing
+        """
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = [
+                error["index"]
+                for error in e.details.get("writeErrors", [])
+                if error.get("code") != DUPLICATE_KEY
+            ]
+            self.flushed_docs += len(docs) - len(failed)
+            if failed:
+                logger.warning("History write-behind: %s of %s docs failed", len(failed), len(docs))
+            return [docs[index] for index in failed]
+        except Exception:
+            # unknown how many went in; _ids are set, so a retry can't duplicate
+            logger.warning("History write-behind flush failed", exc_info=True)
+            return docs
+
+        self.flushed_docs += len(docs)
+        return []
+
+    async def _insert_single(self, doc: dict):
+        try:
+            await self.collection.insert_one(doc)
+        except DuplicateKeyError:
+            pass
+        except Exception:
+            self.failed_docs += 1
+            logger.exception("History write-behind dropped a document")
+            return
+        self.flushed_docs += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "direct_writes": self.direct_writes,
+            "flushes": self.flushes,
+            "flushed_docs": self.flushed_docs,
+            "failed_docs": self.failed_docs,
+            "retried_docs": self.retried_docs,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": (
+                round(self.total_flush_ms / self.flushes, 3)
+                if self.flushes else 0.0
+            )
+        }
+
+
+history_writer = HistoryWriteBehind(
+    collection=history,
+    max_queue=HISTORY_WRITE_BEHIND_MAX_QUEUE,
+    batch_size=HISTORY_WRITE_BEHIND_BATCH_SIZE,
+    flush_ms=HISTORY_WRITE_BEHIND_FLUSH_MS,
+    put_timeout_ms=HISTORY_WRITE_BEHIND_PUT_TIMEOUT_MS,
+    retries=HISTORY_WRITE_BEHIND_RETRIES,
+    retry_ms=HISTORY_WRITE_BEHIND_RETRY_MS
+)
+
+
+# ----------------------------------------
+# APP HOOKS
+# ----------------------------------------
+async def start_history_writer():
+    if HISTORY_WRITE_BEHIND:
+        await history_writer.start()
+
+
+async def stop_history_writer():
+    await history_writer.stop()
+
+
+# ----------------------------------------
+# SAVE HISTORY
+# ----------------------------------------
+async def save_history(doc: dict):
+    """
+    insert_one, or queued when write-behind is running
+    """
+    await history_writer.save(doc)
+
+
+async def save_history_many(docs: list):
+    """
+    Batch answers, same path as save_history
+    """
+    if docs:
+        await history_writer.save_many(docs)
@@ -0,0 +1,691 @@
+"""
+In-Memory Mongo (Motor-compatible stand-in)
+-------------------------------------------
+- Used when MONGO_BACKEND=memory (tests, offline benchmarks)
+- Async API shaped like Motor: find / find_one / insert_* /
+  update_* / delete_many / count_documents / find_one_and_update
+- Supports the filter and update operators BlackBrain uses,
+  not the full MongoDB query language
+- $text over a text index (terms, "phrases", -negation, field
+  weights) with an approximate textScore, and a small aggregate()
+  ($match / $addFields / $sort / $skip / $limit / $project)
+"""
+
+import copy
+import re
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+_MISSING = object()
+# textScore carried on working copies of documents
+_SCORE = "$textScore"
+TEXT_SCORE = {"$meta": "textScore"}
+
+
+# ----------------------------------------
+# FIELD HELPERS
+# ----------------------------------------
+def _get_path(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _set_path(doc: dict, path: str, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset_path(doc: dict, path: str):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _sort_key(value):
+    # None / missing sort first, like MongoDB
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, ObjectId):
+        return (3, value.binary)
+    if isinstance(value, datetime):
+        return (4, value)
+    return (5, str(value))
+
+
+# ----------------------------------------
+# QUERY MATCHING
+# ----------------------------------------
+def _compare(value, op: str, arg) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+
+    if op == "$eq":
+        return _equals(value, arg)
+    if op == "$ne":
+        return not _equals(value, arg)
+    if op == "$in":
+        return any(_equals(value, a) for a in arg)
+    if op == "$nin":
+        return not any(_equals(value, a) for a in arg)
+    if op == "$regex":
+        return isinstance(value, str) and re.search(arg, value) is not None
+
+    if value is _MISSING or value is None or arg is None:
+        return False
+
+    try:
+        if op == "$lt":
+            return value < arg
+        if op == "$lte":
+            return value <= arg
+        if op == "$gt":
+            return value > arg
+        if op == "$gte":
+            return value >= arg
+    except TypeError:
+        return False
+
+    raise NotImplementedError(f"Operator {op} not supported in memory mongo")
+
+
+def _equals(value, arg) -> bool:
+    if value is _MISSING:
+        return arg is None
+    if isinstance(value, list) and not isinstance(arg, list):
+        return arg in value
+    return value == arg
+
+
+def matches(doc: dict, query: Optional[dict]) -> bool:
+    for key, cond in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+            continue
+        if key == "$text":
+            # handled by collection.find (needs index fields)
+            continue
+
+        value = _get_path(doc, key)
+
+        if isinstance(cond, dict) and cond and all(
+            k.startswith("$") for k in cond
+        ):
+            for op, arg in cond.items():
+                if op == "$options":
+                    continue
+                if not _compare(value, op, arg):
+                    return False
+        elif not _equals(value, cond):
+            return False
+
+    return True
+
+
+# ----------------------------------------
+# TEXT SEARCH ($text)
+# ----------------------------------------
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _parse_search(search: str) -> tuple:
+    phrases = [p.lower() for p in re.findall(r'"([^"]+)"', search)]
+    rest = re.sub(r'"[^"]*"', " ", search)
+
+    terms, negated = set(), set()
+    for raw in rest.split():
+        words = _WORD.findall(raw.lower())
+        (negated if raw.startswith("-") else terms).update(words)
+    for phrase in phrases:
+        terms.update(_WORD.findall(phrase))
+    return terms, negated, phrases
+
+
+def text_score(doc: dict, search: str, weights: dict) -> float:
+    """
+    0 -> no match. Like MongoDB with default_language "none":
+    case-insensitive, no stemming; score grows with field weight
+    and term frequency (exact numbers differ from mongod).
+    """
+    terms, negated, phrases = _parse_search(search)
+    score = 0.0
+    texts = []
+
+    for field, weight in weights.items():
+        value = _get_path(doc, field)
+        if not isinstance(value, str):
+            continue
+        text = value.lower()
+        texts.append(text)
+
+        tokens = _WORD.findall(text)
+        for term in terms:
+            count = tokens.count(term)
+            if count:
+                score += weight * (0.5 + 0.5 * count / len(tokens))
+
+    full = "\n".join(texts)
+    if negated & set(_WORD.findall(full)):
+        return 0.0
+    if any(phrase not in full for phrase in phrases):
+        return 0.0
+    return score
+
+
+# ----------------------------------------
+# UPDATES & PROJECTION
+# ----------------------------------------
+def _apply_update(doc: dict, update: dict, inserting: bool = False):
+    for op, fields in update.items():
+        if op == "$set":
+            for path, value in fields.items():
+                _set_path(doc, path, copy.deepcopy(value))
+        elif op == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(doc, path, copy.deepcopy(value))
+        elif op == "$inc":
+            for path, value in fields.items():
+                current = _get_path(doc, path)
+                base = 0 if current is _MISSING else current
+                _set_path(doc, path, base + value)
+        elif op == "$unset":
+            for path in fields:
+                _unset_path(doc, path)
+        elif op == "$push":
+            for path, value in fields.items():
+                current = _get_path(doc, path)
+                items = [] if current is _MISSING else list(current)
+                items.append(copy.deepcopy(value))
+                _set_path(doc, path, items)
+        else:
+            raise NotImplementedError(
+                f"Update {op} not supported in memory mongo"
+            )
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    doc = copy.deepcopy(doc)
+    score = doc.pop(_SCORE, None)
+    if not projection:
+        return doc
+
+    meta = [k for k, v in projection.items() if v == TEXT_SCORE]
+    projection = {k: v for k, v in projection.items() if k not in meta}
+    if not projection:
+        for path in meta:
+            _set_path(doc, path, score)
+        return doc
+
+    include_id = projection.get("_id", 1)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+
+    if fields and all(v for v in fields.values()):
+        result = {}
+        for path in fields:
+            value = _get_path(doc, path)
+            if value is not _MISSING:
+                _set_path(result, path, value)
+    else:
+        result = doc
+        for path in fields:
+            _unset_path(result, path)
+
+    if include_id and "_id" in doc:
+        result["_id"] = doc["_id"]
+    else:
+        result.pop("_id", None)
+    for path in meta:
+        _set_path(result, path, score)
+    return result
+
+
+def _normalize_sort(key_or_list, direction=None) -> list:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return list(key_or_list)
+
+
+def _sorted(docs: list, sort: list) -> list:
+    for key, direction in reversed(sort):
+        if direction == TEXT_SCORE:
+            # {"$meta": "textScore"} sorts best match first
+            key, direction = _SCORE, -1
+        docs = sorted(
+            docs,
+            key=lambda d: _sort_key(_get_path(d, key)),
+            reverse=direction == -1
+        )
+    return docs
+
+
+# ----------------------------------------
+# CURSOR
+# ----------------------------------------
+class MemoryCursor:
+
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._results = None
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    def _materialize(self) -> list:
+        docs = self._collection._match_scored(self._query)
+        if self._sort:
+            docs = _sorted(docs, self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    def __aiter__(self):
+        self._results = iter(self._materialize())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._results)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: Optional[int] = None) -> list:
+        docs = self._materialize()
+        return docs if length is None else docs[:length]
+
+    async def close(self):
+        self._results = iter(())
+
+
+class MemoryAggregateCursor(MemoryCursor):
+
+    def __init__(self, collection, pipeline: list):
+        super().__init__(collection, None, None)
+        self._pipeline = pipeline
+
+    def _materialize(self) -> list:
+        docs = None
+        for stage in self._pipeline:
+            (op, arg), = stage.items()
+
+            if op == "$match":
+                if docs is None:
+                    docs = copy.deepcopy(self._collection._match_scored(arg))
+                elif "$text" in arg:
+                    raise OperationFailure("$text must be in the first $match stage")
+                else:
+                    docs = [d for d in docs if matches(d, arg)]
+                continue
+
+            if docs is None:
+                docs = copy.deepcopy(self._collection._match_scored(None))
+
+            if op in ("$addFields", "$set"):
+                for doc in docs:
+                    for path, value in arg.items():
+                        if value == TEXT_SCORE:
+                            value = doc.get(_SCORE)
+                        elif isinstance(value, str) and value.startswith("$"):
+                            value = _get_path(doc, value[1:])
+                            value = None if value is _MISSING else value
+                        _set_path(doc, path, copy.deepcopy(value))
+            elif op == "$sort":
+                docs = _sorted(docs, _normalize_sort(arg))
+            elif op == "$skip":
+                docs = docs[arg:]
+            elif op == "$limit":
+                docs = docs[:arg]
+            elif op == "$project":
+                docs = [
+                    {**_project(d, arg), _SCORE: d.get(_SCORE)}
+                    for d in docs
+                ]
+            else:
+                raise NotImplementedError(
+                    f"Stage {op} not supported in memory mongo"
+                )
+
+        if docs is None:
+            docs = self._collection._match_scored(None)
+        return [_project(d, None) for d in docs]
+
+
+# ----------------------------------------
+# COLLECTION
+# ----------------------------------------
+class MemoryCollection:
+
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self._docs = {}
+        self._indexes = {}
+
+    # -------- internal --------
+    def _match_all(self, query) -> list:
+        if query and "$text" in query:
+            return [
+                {k: v for k, v in d.items() if k != _SCORE}
+                for d in self._match_scored(query)
+            ]
+        return [d for d in self._docs.values() if matches(d, query)]
+
+    def _text_weights(self) -> dict:
+        for spec in self._indexes.values():
+            fields = [k for k, v in spec["key"] if v == "text"]
+            if fields:
+                weights = spec.get("weights") or {}
+                return {f: weights.get(f, 1) for f in fields}
+        raise OperationFailure("text index required for $text query")
+
+    def _match_scored(self, query) -> list:
+        """
+        Matching documents as working copies; with $text each
+        copy carries its score under _SCORE
+        """
+        text = (query or {}).get("$text")
+        if text is None:
+            return [dict(d) for d in self._docs.values() if matches(d, query)]
+
+        weights = self._text_weights()
+        docs = []
+        for d in self._docs.values():
+            if not matches(d, query):
+                continue
+            score = text_score(d, text["$search"], weights)
+            if score > 0:
+                docs.append({**d, _SCORE: score})
+        return docs
+
+    def _check_unique(self, doc: dict, ignore_id=None):
+        for spec in self._indexes.values():
+            if not spec.get("unique"):
+                continue
+            keys = [k for k, _ in spec["key"]]
+            values = [_get_path(doc, k) for k in keys]
+            for other in self._docs.values():
+                if other["_id"] == ignore_id:
+                    continue
+                if [_get_path(other, k) for k in keys] == values:
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error collection: {self.name}"
+                    )
+
+    def _insert(self, doc: dict):
+        if "_id" not in doc:
+            doc["_id"] = ObjectId()
+        if doc["_id"] in self._docs:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} _id"
+            )
+        self._check_unique(doc)
+        self._docs[doc["_id"]] = copy.deepcopy(doc)
+        return doc["_id"]
+
+    # -------- indexes --------
+    async def create_index(self, keys, **kwargs) -> str:
+        key = _normalize_sort(keys, 1)
+        name = kwargs.get("name") or "_".join(
+            f"{k}_{v}" for k, v in key
+        )
+        self._indexes[name] = {"key": key, **kwargs}
+        return name
+
+    async def index_information(self) -> dict:
+        info = {"_id_": {"key": [("_id", 1)]}}
+        info.update(copy.deepcopy(self._indexes))
+        return info
+
+    async def drop_index(self, name: str):
+        self._indexes.pop(name, None)
+
+    # -------- reads --------
+    def find(self, filter: Optional[dict] = None, projection=None, **kwargs):
+        cursor = MemoryCursor(self, filter, projection)
+        if "sort" in kwargs:
+            cursor.sort(kwargs["sort"])
+        if "limit" in kwargs:
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def find_one(self, filter=None, projection=None, **kwargs):
+        docs = await self.find(filter, projection, **kwargs).limit(1).to_list()
+        return docs[0] if docs else None
+
+    def aggregate(self, pipeline: list, **kwargs):
+        return MemoryAggregateCursor(self, pipeline)
+
+    async def count_documents(self, filter: dict, **kwargs) -> int:
+        return len(self._match_all(filter))
+
+    async def estimated_document_count(self) -> int:
+        return len(self._docs)
+
+    # -------- writes --------
+    async def insert_one(self, doc: dict):
+        return SimpleNamespace(inserted_id=self._insert(doc))
+
+    async def insert_many(self, docs: list, ordered: bool = True):
+        # same error shape as pymongo: BulkWriteError with per-index errors
+        ids = []
+        errors = []
+        for index, doc in enumerate(docs):
+            try:
+                ids.append(self._insert(doc))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors,
+                "writeConcernErrors": [],
+                "nInserted": len(ids)
+            })
+        return SimpleNamespace(inserted_ids=ids)
+
+    def _upsert_doc(self, filter: dict, update: dict) -> dict:
+        doc = {
+            k: copy.deepcopy(v) for k, v in filter.items()
+            if not k.startswith("$") and not isinstance(v, dict)
+        }
+        _apply_update(doc, update, inserting=True)
+        self._insert(doc)
+        return doc
+
+    async def _update(self, filter, update, upsert, many):
+        targets = self._match_all(filter)
+        if not many:
+            targets = targets[:1]
+
+        for doc in targets:
+            updated = copy.deepcopy(doc)
+            _apply_update(updated, update)
+            self._check_unique(updated, ignore_id=doc["_id"])
+            self._docs[doc["_id"]] = updated
+
+        upserted_id = None
+        if not targets and upsert:
+            upserted_id = self._upsert_doc(filter, update)["_id"]
+
+        return SimpleNamespace(
+            matched_count=len(targets),
+            modified_count=len(targets),
+            upserted_id=upserted_id
+        )
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False):
+        return await self._update(filter, update, upsert, many=False)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False):
+        return await self._update(filter, update, upsert, many=True)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        projection=None,
+        sort=None,
+        upsert: bool = False,
+        return_document: bool = False,
+        **kwargs
+    ):
+        targets = self._match_all(filter)
+        if sort:
+            targets = _sorted(targets, _normalize_sort(sort))
+
+        if not targets:
+            if not upsert:
+                return None
+            doc = self._upsert_doc(filter, update)
+            return _project(doc, projection) if return_document else None
+
+        before = targets[0]
+        after = copy.deepcopy(before)
+        _apply_update(after, update)
+        self._check_unique(after, ignore_id=before["_id"])
+        self._docs[before["_id"]] = after
+
+        return _project(after if return_document else before, projection)
+
+    async def bulk_write(self, requests: list, ordered: bool = True):
+        """
+        UpdateOne / UpdateMany / DeleteOne / DeleteMany / InsertOne
+        """
+        matched = modified = deleted = inserted = 0
+        for op in requests:
+            kind = type(op).__name__
+            if kind == "InsertOne":
+                self._insert(op._doc)
+                inserted += 1
+            elif kind in ("UpdateOne", "UpdateMany"):
+                result = await self._update(
+                    op._filter, op._doc, op._upsert, many=kind == "UpdateMany"
+                )
+                matched += result.matched_count
+                modified += result.modified_count
+            elif kind in ("DeleteOne", "DeleteMany"):
+                targets = self._match_all(op._filter)
+                if kind == "DeleteOne":
+                    targets = targets[:1]
+                for doc in targets:
+                    del self._docs[doc["_id"]]
+                deleted += len(targets)
+            else:
+                raise NotImplementedError(f"{kind} not supported in memory mongo")
+
+        return SimpleNamespace(
+            matched_count=matched,
+            modified_count=modified,
+            deleted_count=deleted,
+            inserted_count=inserted
+        )
+
+    async def delete_one(self, filter: dict):
+        targets = self._match_all(filter)[:1]
+        for doc in targets:
+            del self._docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=len(targets))
+
+    async def delete_many(self, filter: dict):
+        targets = self._match_all(filter)
+        for doc in targets:
+            del self._docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=len(targets))
+
+    def watch(self, *args, **kwargs):
+        # no change streams, same as a standalone mongod
+        raise NotImplementedError("Change streams need a replica set")
+
+
+# ----------------------------------------
+# DATABASE / CLIENT
+# ----------------------------------------
+class MemoryDatabase:
+
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    async def command(self, command, *args, **kwargs) -> dict:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        if name == "collMod":
+            # index option change (TTL), by index name
+            index = dict(kwargs.get("index") or {})
+            spec = self[args[0]]._indexes.get(index.pop("name", None))
+            if spec is None:
+                raise OperationFailure("index not found", code=27)
+            spec.update(index)
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Command {name} not supported in memory mongo")
+
+    async def list_collection_names(self) -> list:
+        return list(self._collections)
+
+
+class MemoryClient:
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._databases = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(self, name)
+        return self._databases[name]
+
+    @property
+    def admin(self) -> MemoryDatabase:
+        return self["admin"]
+
+    def close(self):
+        pass
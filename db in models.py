@@ -54,6 +54,10 @@ class BrainQuestion(BaseModel):
     mode: str = "basic"  # basic / decision / study / money / problem / nobullshit
 
 
+class BrainBatchRequest(BaseModel):
+    items: List[BrainQuestion]
+
+
 class BrainAnswer(BaseModel):
     user_id: str
     question: str
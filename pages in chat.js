@@ -1,5 +1,5 @@
 import React, { useState } from "react";
-import { askBrain } from "../api";
+import { askBrainStream } from "../api";
 
 const Chat = () => {
   const [messages, setMessages] = useState([]);
@@ -26,17 +26,34 @@ const Chat = () => {
     setLoading(true);
 
     try {
-      const res = await askBrain(input, mode);
+      const response = {};
+      let brainIndex = null;
 
-      const brainMessage = {
-        sender: "brain",
-        text: JSON.stringify(res.data.response, null, 2)
-      };
+      await askBrainStream(input, mode, (event) => {
+        if (event.event === "error") {
+          throw new Error(event.detail);
+        }
+        if (event.event !== "section") return;
 
-      setMessages((prev) => [...prev, brainMessage]);
+        response[event.section] = event.value;
+        const text = JSON.stringify(response, null, 2);
+
+        // first section replaces "Thinking...", later ones update it
+        setLoading(false);
+        setMessages((prev) => {
+          if (brainIndex === null) {
+            brainIndex = prev.length;
+            return [...prev, { sender: "brain", text }];
+          }
+          const next = [...prev];
+          next[brainIndex] = { sender: "brain", text };
+          return next;
+        });
+      });
     } catch (err) {
       setError(
         err.response?.data?.detail ||
+          err.message ||
           "Something went wrong. Try again."
       );
     } finally {
@@ -0,0 +1,60 @@
+"""
+History Archive Pass
+--------------------
+Moves history older than N days into the cold tier
+(history_archive: one compressed bucket per user per month).
+
+- Oldest (user, month) first, resumable: just run it again
+- Free-plan history (expires_at set) is left to its TTL
+- --dry-run only counts what would move
+
+Run from backend folder (cron, e.g. nightly):
+    python -m scripts.archive_history --dry-run
+    python -m scripts.archive_history --older-than-days 90 --max-buckets 1000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from core.config import (
+    HISTORY_ARCHIVE_AFTER_DAYS,
+    HISTORY_ARCHIVE_MAX_BUCKETS,
+    HISTORY_ARCHIVE_BUCKET_MAX_ENTRIES
+)
+from core.history_archive import archive_eligible_query, archive_old_history
+from db.mongo import history
+
+
+async def run(older_than_days: int, max_buckets: int, bucket_size: int, dry_run: bool):
+    started = time.perf_counter()
+
+    if dry_run:
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        stats = {"eligible": await history.count_documents(archive_eligible_query(cutoff))}
+    else:
+        stats = await archive_old_history(older_than_days, max_buckets, bucket_size)
+        if stats["raw_bytes"]:
+            stats["ratio"] = round(stats["stored_bytes"] / stats["raw_bytes"], 3)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old history into monthly buckets")
+    parser.add_argument("--older-than-days", type=int, default=HISTORY_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--max-buckets", type=int, default=HISTORY_ARCHIVE_MAX_BUCKETS)
+    parser.add_argument("--bucket-size", type=int, default=HISTORY_ARCHIVE_BUCKET_MAX_ENTRIES)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    stats = asyncio.run(
+        run(args.older_than_days, args.max_buckets, args.bucket_size, args.dry_run)
+    )
+    print("done:", stats)
+
+
+if __name__ == "__main__":
+    main()
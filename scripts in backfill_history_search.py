@@ -0,0 +1,97 @@
+"""
+History Search Backfill
+-----------------------
+Brings history documents to the current search layout:
+"search_text" (template token + variable text, see
+core.brain_engine.response_search_text) for the history_search_v2
+text index, and drops the old "response_text" (full rendered answer).
+
+- Walks history in _id order, batch by batch (resumable: --after-id)
+- Works on both storage forms (full response / template + params)
+- The old text index is dropped by the index reconcile on startup
+- --dry-run only counts
+
+Run from backend folder:
+    python -m scripts.backfill_history_search --dry-run
+    python -m scripts.backfill_history_search --batch-size 500 --pause-ms 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from core.brain_engine import search_fields, unpack_response
+from db.mongo import history
+
+
+async def backfill(batch_size: int, pause_ms: int, dry_run: bool, after_id: str = None):
+    query = {"$or": [
+        {"response_text": {"$exists": True}},
+        {"search_text": {"$exists": False}}
+    ]}
+    last_id = ObjectId(after_id) if after_id else None
+
+    stats = {"scanned": 0, "updated": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    while True:
+        page_query = dict(query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+
+        cursor = history.find(page_query).sort("_id", 1).limit(batch_size)
+        docs = await cursor.to_list(length=batch_size)
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            stats["scanned"] += 1
+            response = unpack_response(doc)
+            fields = search_fields(doc.get("question"), response) if response else {}
+            if not fields and "response_text" not in doc:
+                stats["skipped"] += 1
+                continue
+
+            update = {"$unset": {"response_text": ""}}
+            if fields:
+                update["$set"] = fields
+            ops.append(UpdateOne({"_id": doc["_id"]}, update))
+
+        if ops and not dry_run:
+            result = await history.bulk_write(ops, ordered=False)
+            stats["updated"] += result.modified_count
+        elif ops:
+            stats["updated"] += len(ops)
+
+        last_id = docs[-1]["_id"]
+        print(f"... up to _id {last_id}: {stats}")
+
+        if len(docs) < batch_size:
+            break
+        if pause_ms:
+            await asyncio.sleep(pause_ms / 1000)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill history search text (search_text)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause-ms", type=int, default=50, help="throttle between batches")
+    parser.add_argument("--after-id", default=None, help="resume after this _id")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    stats = asyncio.run(
+        backfill(args.batch_size, args.pause_ms, args.dry_run, args.after_id)
+    )
+    print("done:", stats)
+
+
+if __name__ == "__main__":
+    main()
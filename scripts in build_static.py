@@ -0,0 +1,120 @@
+"""
+Static Asset Build
+------------------
+Prepares the static folder for PrecompressedStaticFiles:
+
+- app.js -> app.<hash>.js (content hash, served with immutable caching)
+- .gz (and .br when "brotli" is installed) siblings for text assets
+- manifest.json: original name -> hashed name, for templates / frontend
+
+Run from backend folder:
+    python -m scripts.build_static
+    python -m scripts.build_static --static-dir static --no-hash
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+from utils.compression import HASHED_NAME, brotli
+
+COMPRESSIBLE = (".js", ".css", ".html", ".json", ".svg", ".txt", ".map")
+SKIP_SUFFIXES = (".gz", ".br")
+MANIFEST = "manifest.json"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    base, ext = os.path.splitext(name)
+    return f"{base}.{digest}{ext}"
+
+
+def write_if_smaller(path: str, original_size: int, data: bytes) -> bool:
+    # no point shipping a sibling that isn't smaller
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def compress_file(path: str, stats: dict):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if write_if_smaller(path + ".gz", len(data), gz):
+        stats["gzip"] += 1
+        stats["bytes_gzip"] += len(gz)
+
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if write_if_smaller(path + ".br", len(data), br):
+            stats["brotli"] += 1
+            stats["bytes_brotli"] += len(br)
+
+    stats["bytes_original"] += len(data)
+
+
+def build(static_dir: str, hash_names: bool = True) -> dict:
+    manifest = {}
+    stats = {
+        "files": 0, "hashed": 0, "gzip": 0, "brotli": 0,
+        "bytes_original": 0, "bytes_gzip": 0, "bytes_brotli": 0
+    }
+
+    for root, _, files in os.walk(static_dir):
+        for name in sorted(files):
+            if name.endswith(SKIP_SUFFIXES) or name == MANIFEST:
+                continue
+            if HASHED_NAME.search(name):
+                # output of an earlier build
+                continue
+
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, static_dir).replace(os.sep, "/")
+            stats["files"] += 1
+            target = path
+
+            if hash_names:
+                with open(path, "rb") as f:
+                    data = f.read()
+                target = os.path.join(root, hashed_name(name, content_hash(data)))
+                if not os.path.exists(target):
+                    with open(target, "wb") as f:
+                        f.write(data)
+                stats["hashed"] += 1
+
+            manifest[rel] = os.path.relpath(target, static_dir).replace(os.sep, "/")
+
+            if name.endswith(COMPRESSIBLE):
+                compress_file(target, stats)
+
+    with open(os.path.join(static_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash + precompress static assets")
+    parser.add_argument("--static-dir", default="static")
+    parser.add_argument("--no-hash", action="store_true",
+                        help="only write .gz/.br siblings")
+    args = parser.parse_args()
+
+    stats = build(args.static_dir, hash_names=not args.no_hash)
+    if brotli is None:
+        print("brotli not installed: only .gz siblings written")
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+History Template Migration
+--------------------------
+Rewrites old history documents (full "response" dict) into the
+template form: {"template": "<type>@<version>", "params": {...}}.
+
+- Walks history in _id order, batch by batch (resumable: --after-id)
+- Documents that don't match a template exactly are left as they are
+- --dry-run only counts and estimates saved bytes
+
+Run from backend folder:
+    python -m scripts.migrate_history_templates --dry-run
+    python -m scripts.migrate_history_templates --batch-size 500 --pause-ms 50
+"""
+
+import argparse
+import asyncio
+import time
+
+import bson
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from core.brain_engine import pack_response
+from db.mongo import history
+
+
+async def migrate(batch_size: int, pause_ms: int, dry_run: bool, after_id: str = None):
+    query = {"response": {"$exists": True}, "template": {"$exists": False}}
+    last_id = ObjectId(after_id) if after_id else None
+
+    stats = {"scanned": 0, "migrated": 0, "skipped": 0, "bytes_before": 0, "bytes_after": 0}
+    started = time.perf_counter()
+
+    while True:
+        page_query = dict(query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+
+        cursor = history.find(page_query).sort("_id", 1).limit(batch_size)
+        docs = await cursor.to_list(length=batch_size)
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            stats["scanned"] += 1
+            packed = pack_response(doc.get("question"), doc["response"])
+
+            if "template" not in packed:
+                stats["skipped"] += 1
+                continue
+
+            new_doc = {k: v for k, v in doc.items() if k != "response"}
+            new_doc.update(packed)
+            stats["bytes_before"] += len(bson.encode(doc))
+            stats["bytes_after"] += len(bson.encode(new_doc))
+
+            ops.append(UpdateOne(
+                # only rewrite if nobody touched it meanwhile
+                {"_id": doc["_id"], "template": {"$exists": False}},
+                {"$set": packed, "$unset": {"response": ""}}
+            ))
+
+        if ops and not dry_run:
+            result = await history.bulk_write(ops, ordered=False)
+            stats["migrated"] += result.modified_count
+        elif ops:
+            stats["migrated"] += len(ops)
+
+        last_id = docs[-1]["_id"]
+        print(f"... up to _id {last_id}: {stats}")
+
+        if len(docs) < batch_size:
+            break
+        if pause_ms:
+            await asyncio.sleep(pause_ms / 1000)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    if stats["bytes_after"]:
+        stats["shrink_factor"] = round(stats["bytes_before"] / stats["bytes_after"], 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate history to template storage")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause-ms", type=int, default=50, help="throttle between batches")
+    parser.add_argument("--after-id", default=None, help="resume after this _id")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    stats = asyncio.run(
+        migrate(args.batch_size, args.pause_ms, args.dry_run, args.after_id)
+    )
+    print("done:", stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Startup Profile
+---------------
+Where does backend start-up time go?
+
+- Import profile: `python -X importtime -c "import main"` in a fresh
+  interpreter, slowest modules (cumulative) + time per top-level package
+- --check: cold start budget. Spawns uvicorn, times process start ->
+  first 200 from /health and exits 1 when it is over STARTUP_BUDGET_MS
+  (use it as the CI gate after dependency / import changes)
+
+Run from backend folder:
+    python -m scripts.startup_profile --top 25
+    python -m scripts.startup_profile --check --budget-ms 2500
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from core.config import STARTUP_BUDGET_MS
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+# ----------------------------------------
+# IMPORT PROFILE
+# ----------------------------------------
+def import_times(module: str = "main") -> list:
+    """
+    [(module, self_us, cumulative_us, depth)] in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def by_package(rows: list) -> dict:
+    totals = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def print_import_profile(rows: list, top: int):
+    total_ms = sum(row[1] for row in rows) / 1000
+    print(f"import main: {total_ms:.1f} ms, {len(rows)} modules\n")
+
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, self_us, cumulative_us, depth in sorted(
+        rows, key=lambda row: row[2], reverse=True
+    )[:top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+
+    print(f"\n{'self ms':>14}  package")
+    for package, self_us in list(by_package(rows).items())[:top]:
+        print(f"{self_us / 1000:>14.1f}  {package}")
+
+
+# ----------------------------------------
+# COLD START CHECK
+# ----------------------------------------
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start_ms(timeout: float = 60.0) -> float:
+    """
+    uvicorn spawn -> first 200 from /health
+    """
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy()
+    )
+
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise SystemExit(f"uvicorn exited with code {server.returncode}")
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0)
+                if response.status_code == 200:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise SystemExit(f"/health not ready after {timeout}s")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend startup profile")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--check", action="store_true", help="cold start budget check")
+    parser.add_argument("--budget-ms", type=int, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="cold starts, best one counts")
+    args = parser.parse_args()
+
+    print_import_profile(import_times(args.module), args.top)
+
+    if not args.check:
+        return
+
+    # best of N: one slow run is usually the machine, not the code
+    runs = [cold_start_ms() for _ in range(args.runs)]
+    best = min(runs)
+    print(f"\ncold start -> /health: {best:.0f} ms "
+          f"(runs: {', '.join(f'{run:.0f}' for run in runs)}), budget {args.budget_ms} ms")
+
+    if best > args.budget_ms:
+        print("FAIL: over startup budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
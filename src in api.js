@@ -50,17 +50,84 @@ export const askBrain = (question, mode = "basic") => {
   });
 };
 
+/*
+  Streaming ask (NDJSON).
+  onEvent is called once per line: start / section / done / error
+*/
+export const askBrainStream = async (question, mode = "basic", onEvent) => {
+  const token = localStorage.getItem("token");
+
+  const res = await fetch(`${API_BASE_URL}/brain/ask/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      ...(token ? { Authorization: `Bearer ${token}` } : {})
+    },
+    body: JSON.stringify({ question, mode })
+  });
+
+  if (!res.ok) {
+    const body = await res.json().catch(() => ({}));
+    throw new Error(body.detail || "Something went wrong. Try again.");
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+
+    lines.filter((line) => line.trim()).forEach((line) => {
+      onEvent(JSON.parse(line));
+    });
+  }
+
+  if (buffer.trim()) {
+    onEvent(JSON.parse(buffer));
+  }
+};
+
 /* ---------------------------------------
    HISTORY APIs
 ---------------------------------------- */
-export const getHistory = (limit = 20, skip = 0) => {
+export const getHistory = (limit = 20, skip = 0, after = null) => {
+  if (after) {
+    return api.get(`/history?limit=${limit}&after=${encodeURIComponent(after)}`);
+  }
   return api.get(`/history?limit=${limit}&skip=${skip}`);
 };
 
+// searches recent (hot) history only: when unsearched_until is set,
+// entries up to that date are archived and not searched
+export const searchHistory = (q, { mode = null, limit = 20, after = null } = {}) => {
+  const params = { q, limit };
+  if (mode) params.mode = mode;
+  if (after) params.after = after;
+  return api.get("/history/search", { params });
+};
+
+export const exportHistory = (format = "ndjson", { since = null, until = null, after = null } = {}) => {
+  const params = { format };
+  if (since) params.since = since;
+  if (until) params.until = until;
+  if (after) params.after = after;
+  return api.get("/history/export", { params, responseType: "blob" });
+};
+
 export const clearHistory = () => {
   return api.delete("/history/clear");
 };
 
+export const getHistoryJob = (job_id) => {
+  return api.get(`/history/jobs/${job_id}`);
+};
+
 /* ---------------------------------------
    SUBSCRIPTION / PAYMENT APIs
 ---------------------------------------- */
@@ -0,0 +1,36 @@
+"""
+Startup Budget
+--------------
+Cold start gate: uvicorn spawn -> first 200 from /health must stay
+under STARTUP_BUDGET_MS (same check as `scripts.startup_profile --check`).
+
+In-memory Mongo / quota unless MONGO_BACKEND / QUOTA_BACKEND are set,
+so it runs without a database.
+
+Run from backend folder:
+    python -m pytest tests/test_startup_budget.py
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from core.config import STARTUP_BUDGET_MS  # noqa: E402
+from scripts.startup_profile import cold_start_ms  # noqa: E402
+
+RUNS = 3
+
+
+def test_cold_start_under_budget(monkeypatch):
+    monkeypatch.setenv("MONGO_BACKEND", os.getenv("MONGO_BACKEND", "memory"))
+    monkeypatch.setenv("QUOTA_BACKEND", os.getenv("QUOTA_BACKEND", "memory"))
+
+    # best of N: one slow run is usually the machine, not the code
+    runs = [cold_start_ms() for _ in range(RUNS)]
+
+    assert min(runs) < STARTUP_BUDGET_MS, (
+        f"cold start {min(runs):.0f} ms over budget {STARTUP_BUDGET_MS} ms "
+        f"(runs: {', '.join(f'{run:.0f}' for run in runs)})"
+    )